@@ -0,0 +1,142 @@
+import os
+
+import pygame
+
+from bundle import ASSET_DIR, BUNDLE_PATH, AssetBundle
+
+
+class AssetManager(object):
+    """图片资源缓存：每张图片只从磁盘读取一次，所有精灵共享同一个Surface
+
+    相对路径按游戏目录解析。打包过资源包（python bundle.py）时直接从包里取已解码的像素，
+    包不存在或源图片改过时再解码图片文件。
+    """
+
+    def __init__(self, root=ASSET_DIR, bundle_path=BUNDLE_PATH):
+        self.root = root
+        self.bundle_path = bundle_path
+        self.__bundle = None  # 第一次加载时打开，打不开为False
+        self.__images = {}
+        self.__converted = set()
+        self.__opaque = set()  # 资源包里的不透明图片（图集统一带透明通道，转换时去掉）
+        self.__variants = {}  # (图片名, 特效序列) -> 加了特效的Surface
+        self.__masks = {}  # Surface或尺寸 -> 碰撞掩码
+        self.hits = 0
+        self.misses = 0
+
+    def load(self, image_name):
+        """读取图片，命中缓存时直接返回共享的Surface"""
+        image = self.__images.get(image_name)
+        if image is not None:
+            self.hits += 1
+            if image_name not in self.__converted:
+                # 加载时窗口尚未创建，首次可用时再转换
+                image = self.__convert(image_name, image)
+            return image
+        self.misses += 1
+        path = os.path.join(self.root, image_name)
+        image = self.__from_bundle(image_name, path)
+        if image is None:
+            image = pygame.image.load(path)
+        self.__images[image_name] = image
+        return self.__convert(image_name, image)
+
+    def __from_bundle(self, image_name, path):
+        """从资源包取图片，包里没有或已过期时返回None"""
+        bundle = self.__bundle
+        if bundle is None:
+            try:
+                bundle = AssetBundle(self.bundle_path)
+            except (OSError, ValueError):
+                bundle = False
+            self.__bundle = bundle
+        name = os.path.relpath(path, self.root)
+        if not bundle or name not in bundle or not bundle.is_current(name, path):
+            return None
+        if not bundle.has_alpha(name):
+            self.__opaque.add(image_name)
+        return bundle.image(name)
+
+    def __convert(self, image_name, image):
+        """转换为显示格式，带透明通道的图片使用convert_alpha"""
+        if pygame.display.get_surface() is None:
+            return image
+        if image.get_flags() & pygame.SRCALPHA and image_name not in self.__opaque:
+            image = image.convert_alpha()
+        else:
+            image = image.convert()
+        self.__images[image_name] = image
+        self.__converted.add(image_name)
+        return image
+
+    def variant(self, image_name, *effects):
+        """返回按顺序加了effects的图片，每种(图片, 特效序列)只生成一次"""
+        if not effects:
+            return self.load(image_name)
+        key = (image_name, effects)
+        image = self.__variants.get(key)
+        if image is not None:
+            self.hits += 1
+            return image
+        image = self.load(image_name)
+        for effect in effects:
+            image = effect.apply(image)
+        if pygame.display.get_surface() is not None:
+            image = image.convert_alpha() if image.get_flags() & pygame.SRCALPHA else image.convert()
+            # 原图转换之前生成的变体不缓存，窗口创建后重新生成
+            self.__variants[key] = image
+        return image
+
+    def mask(self, image):
+        """图片的碰撞掩码（不透明像素），每个Surface只生成一次
+
+        精灵共享缓存里的图片和变体，所以同一种图片的掩码也是共享的。
+        """
+        mask = self.__masks.get(image)
+        if mask is None:
+            mask = self.__masks[image] = pygame.mask.from_surface(image)
+        return mask
+
+    def rect_mask(self, size):
+        """整块矩形的掩码（按矩形检测的一方使用）"""
+        mask = self.__masks.get(size)
+        if mask is None:
+            mask = self.__masks[size] = pygame.mask.Mask(size, fill=True)
+        return mask
+
+    def convert_all(self):
+        """窗口创建后把已缓存但未转换的图片统一转换"""
+        self.__masks.clear()
+        for image_name, image in list(self.__images.items()):
+            if image_name not in self.__converted:
+                self.__convert(image_name, image)
+
+    def clear(self):
+        """清空缓存（切换显示模式后需要重新转换）"""
+        self.__images.clear()
+        self.__converted.clear()
+        self.__opaque.clear()
+        self.__variants.clear()
+        self.__masks.clear()
+
+    @property
+    def bytes_held(self):
+        """缓存中所有Surface占用的像素字节数"""
+        images = list(self.__images.values()) + list(self.__variants.values())
+        return sum(image.get_bytesize() * image.get_width() * image.get_height() for image in images)
+
+    def stats(self):
+        """缓存命中、未命中次数和占用字节数"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "images": len(self.__images),
+            "variants": len(self.__variants),
+            "masks": len(self.__masks),
+            "bundled": bool(self.__bundle),
+            "bytes": self.bytes_held,
+        }
+
+
+# 全局共享的资源管理器
+assets = AssetManager()
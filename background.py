@@ -0,0 +1,87 @@
+import math
+
+
+class ScrollingLayer(object):
+    """一层竖直循环滚动的背景
+
+    图片只保存一份（由AssetManager转换好），绘制时按滚动偏移只贴可见的源区域，
+    偏移取模循环，速度可以是小数（像素/帧）。
+    """
+
+    def __init__(self, image, view_size, speed=1.0):
+        self.image = image
+        self.view_width, self.view_height = view_size
+        self.width, self.height = image.get_size()
+        self.speed = speed
+        self.offset = 0.0  # 图片顶端在屏幕上的位置，取模图片高度
+        self.prev_offset = 0.0
+
+    def update(self, dt=1.0):
+        self.prev_offset = self.offset
+        self.offset = (self.offset + self.speed * dt) % self.height
+
+    def draw_offset(self, alpha=1.0):
+        """上一次和这一次模拟之间按alpha插值的偏移（整数像素）"""
+        prev, offset = self.prev_offset, self.offset
+        # 这一步刚好绕回时，按没有取模的位置插值
+        if self.speed > 0 and offset < prev:
+            offset += self.height
+        elif self.speed < 0 and offset > prev:
+            offset -= self.height
+        return math.floor(prev + (offset - prev) * alpha) % self.height
+
+    def blit_sequence(self, alpha=1.0):
+        """覆盖整个视口的(图片, 位置, 源区域)列表"""
+        image, width, height = self.image, self.width, self.height
+        sequence = []
+        # 屏幕y处显示图片第(y - offset) mod height行
+        y = 0
+        row = (-self.draw_offset(alpha)) % height
+        while y < self.view_height:
+            rows = min(height - row, self.view_height - y)
+            x = 0
+            while x < self.view_width:
+                columns = min(width, self.view_width - x)
+                sequence.append((image, (x, y), (0, row, columns, rows)))
+                x += columns
+            y += rows
+            row = 0
+        return sequence
+
+
+class ScrollingBackground(object):
+    """由若干滚动层组成的视差背景，按加入顺序从远到近绘制
+
+    作为批量实体登记到EntityRegistry（实现了update/draw/rects/len）。
+    """
+
+    def __init__(self, layers=()):
+        self.layers = list(layers)
+
+    def add_layer(self, layer):
+        self.layers.append(layer)
+        return layer
+
+    def update(self, dt=1.0):
+        for layer in self.layers:
+            layer.update(dt)
+
+    def draw(self, surface, alpha=1.0):
+        sequence = []
+        for layer in self.layers:
+            sequence.extend(layer.blit_sequence(alpha))
+        surface.blits(sequence, doreturn=False)
+
+    def offsets(self, alpha=1.0):
+        """各层的绘制偏移，偏移相同时画出来的背景也相同"""
+        return tuple(layer.draw_offset(alpha) for layer in self.layers)
+
+    def rects(self, alpha=1.0):
+        """背景总是覆盖整个视口"""
+        if not self.layers:
+            return []
+        layer = self.layers[0]
+        return [(0, 0, layer.view_width, layer.view_height)]
+
+    def __len__(self):
+        return len(self.layers)
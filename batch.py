@@ -0,0 +1,188 @@
+"""批量无头模拟：用进程池并行跑大量带种子的对局，用于难度参数调优
+
+    python batch.py --games 1000 --sweep difficulty_step=0.1,0.2,0.3 --sweep spawn_interval=600,800
+每局结果逐行写入--out（JSONL），结束后按参数组合汇总到--report。
+"""
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+# 不让SDL接管SIGTERM，否则进程池结束时terminate()杀不掉子进程
+os.environ.setdefault("SDL_NO_SIGNAL_HANDLERS", "1")
+
+import pygame
+
+from main import PlaneGame, FRAME_PER_SEC
+from profiler import percentile
+from sim import FrameInput
+
+# 可调的难度参数及默认值
+DEFAULT_PARAMS = {
+    "difficulty_increase_interval": 10,
+    "difficulty_step": 0.2,
+    "enemy_base_shoot": 0.3,
+    "spawn_interval": 800,
+    "win_score": 1000,
+}
+MOVES = (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN)
+
+
+def random_policy(rng):
+    """随机游走：每隔一段时间换一个方向"""
+    direction = None
+    hold = 0
+    while True:
+        if hold <= 0:
+            direction = rng.choice(MOVES + (None,))
+            hold = rng.randint(10, 60)
+        hold -= 1
+        yield FrameInput(pressed=() if direction is None else (direction,))
+
+
+def sweep_policy(rng):
+    """左右来回扫射"""
+    left = FrameInput(pressed=(pygame.K_LEFT,))
+    right = FrameInput(pressed=(pygame.K_RIGHT,))
+    while True:
+        for frame_input in (left,) * 45 + (right,) * 45:
+            yield frame_input
+
+
+POLICIES = {"random": random_policy, "sweep": sweep_policy}
+
+
+def apply_params(game, params):
+    """把参数写进游戏对象，并按新的间隔重新安排定时任务"""
+    for name, value in params.items():
+        setattr(game, name, value)
+    game.reset_timers()
+
+
+def run_game(task):
+    """跑一局，返回这局的统计（在子进程中执行）"""
+    seed, params, policy, max_frames = task
+    game = PlaneGame(headless=True, seed=seed)
+    apply_params(game, params)
+    inputs = POLICIES[policy](random.Random(seed))
+    peak_enemies = peak_enemy_bullets = peak_entities = 0
+    start = time.perf_counter()
+    frames = 0
+    while frames < max_frames and not game.is_game_over and not game.is_passed:
+        game.step(1, next(inputs))
+        frames += 1
+        peak_enemies = max(peak_enemies, len(game.enemy_group))
+        peak_enemy_bullets = max(peak_enemy_bullets, len(game.enemy_bullets))
+        peak_entities = max(peak_entities, len(game.entities))
+    elapsed = time.perf_counter() - start
+    return {
+        "seed": seed,
+        "params": params,
+        "survival_time": frames / FRAME_PER_SEC,
+        "score": game.score,
+        "passed": game.is_passed,
+        "peak_enemies": peak_enemies,
+        "peak_enemy_bullets": peak_enemy_bullets,
+        "peak_entities": peak_entities,
+        "frame_ms": elapsed * 1000.0 / max(frames, 1),
+    }
+
+
+def make_tasks(grid, games, policy, max_frames, base_seed=0):
+    """参数网格的每个组合跑games局，种子在组合之间共享以便对比"""
+    names = list(grid)
+    tasks = []
+    for values in itertools.product(*(grid[name] for name in names)):
+        params = dict(DEFAULT_PARAMS)
+        params.update(zip(names, values))
+        for i in range(games):
+            tasks.append((base_seed + i, params, policy, max_frames))
+    return tasks
+
+
+def aggregate(results):
+    """按参数组合汇总"""
+    groups = {}
+    for result in results:
+        key = json.dumps(result["params"], sort_keys=True)
+        groups.setdefault(key, []).append(result)
+    report = []
+    for key, items in groups.items():
+        survival = [item["survival_time"] for item in items]
+        scores = [item["score"] for item in items]
+        report.append({
+            "params": json.loads(key),
+            "games": len(items),
+            "survival_mean": sum(survival) / len(items),
+            "survival_p50": percentile(survival, 50),
+            "score_mean": sum(scores) / len(items),
+            "score_p50": percentile(scores, 50),
+            "win_rate": sum(item["passed"] for item in items) / len(items),
+            "peak_entities": max(item["peak_entities"] for item in items),
+            "frame_ms": sum(item["frame_ms"] for item in items) / len(items),
+        })
+    return report
+
+
+def run_batch(tasks, processes=None, out=None):
+    """用进程池跑所有任务，结果一边返回一边写入out"""
+    results = []
+    chunksize = max(1, len(tasks) // ((processes or os.cpu_count() or 1) * 8))
+    stream = open(out, "w", encoding="utf-8") if out else None
+    try:
+        with multiprocessing.Pool(processes) as pool:
+            for result in pool.imap_unordered(run_game, tasks, chunksize):
+                results.append(result)
+                if stream is not None:
+                    stream.write(json.dumps(result, ensure_ascii=False) + "\n")
+                    stream.flush()
+    finally:
+        if stream is not None:
+            stream.close()
+    return results
+
+
+def parse_sweep(items):
+    """把name=v1,v2,...解析为参数网格"""
+    grid = {}
+    for item in items:
+        name, _, values = item.partition("=")
+        if name not in DEFAULT_PARAMS:
+            raise SystemExit(f"未知参数: {name}，可选: {', '.join(DEFAULT_PARAMS)}")
+        grid[name] = [json.loads(value) for value in values.split(",")]
+    return grid
+
+
+def main():
+    parser = argparse.ArgumentParser(description="批量无头模拟")
+    parser.add_argument("--games", type=int, default=100, help="每个参数组合跑多少局")
+    parser.add_argument("--sweep", action="append", default=[], help="参数扫描，例如difficulty_step=0.1,0.2")
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="random")
+    parser.add_argument("--max-seconds", type=float, default=600, help="每局最长游戏时间（秒）")
+    parser.add_argument("--processes", type=int, help="进程数（默认CPU核数）")
+    parser.add_argument("--seed", type=int, default=0, help="起始种子")
+    parser.add_argument("--out", help="逐局结果JSONL文件")
+    parser.add_argument("--report", help="汇总报告JSON文件")
+    args = parser.parse_args()
+
+    tasks = make_tasks(parse_sweep(args.sweep), args.games, args.policy,
+                       int(args.max_seconds * FRAME_PER_SEC), args.seed)
+    start = time.perf_counter()
+    results = run_batch(tasks, args.processes, args.out)
+    elapsed = time.perf_counter() - start
+    report = aggregate(results)
+    print(f"{len(results)} 局，用时 {elapsed:.1f}s")
+    for row in sorted(report, key=lambda row: json.dumps(row["params"], sort_keys=True)):
+        print(f"{row['params']}: 存活 {row['survival_mean']:.1f}s 得分 {row['score_mean']:.0f} "
+              f"通关率 {row['win_rate']:.1%} 峰值实体 {row['peak_entities']}")
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == '__main__':
+    main()
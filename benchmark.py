@@ -0,0 +1,204 @@
+"""游戏主循环压力测试
+
+无头运行几个固定场景，输出每秒帧数和各阶段耗时，并与保存的基线比较：
+    python benchmark.py                  # 跑全部场景并与基线比较
+    python benchmark.py --save-baseline  # 把本次结果保存为基线
+    python benchmark.py --startup        # 测量冷启动到第一帧的时间
+基线与机器相关，换机器后需要重新保存。
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+
+from main import PlaneGame, SCREEN_RECT
+from sim import FrameInput
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks", "baseline.json")
+# 每个场景的帧数
+FRAMES = 1200
+# 冷启动（启动解释器到画出第一帧）的时间预算（毫秒）
+STARTUP_BUDGET_MS = 800
+# 在新进程里执行，输出导入、创建游戏和第一帧各自的耗时
+STARTUP_SCRIPT = """
+import json, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+game = main.PlaneGame(headless=True)
+created = time.perf_counter()
+game.render = True
+game.step(1)
+main.pygame.display.update()
+drawn = time.perf_counter()
+print(json.dumps({"import": (imported - start) * 1000, "init": (created - imported) * 1000,
+                  "first_frame": (drawn - created) * 1000}))
+"""
+# 左右来回移动的英雄输入
+HERO_INPUTS = [FrameInput(pressed={pygame.K_LEFT if (i // 60) % 2 else pygame.K_RIGHT})
+               for i in range(FRAMES)]
+
+
+def fill_enemies(game, count):
+    """把敌机补到count架，随机分布在屏幕上"""
+    while len(game.enemy_group) < count:
+        enemy = game.spawn_enemy()
+        enemy.rect.y = game.rng.randint(0, SCREEN_RECT.height // 2)
+
+
+def fill_enemy_bullets(game, count):
+    """把敌机子弹补到count颗"""
+    bullets = game.enemy_bullets
+    for _ in range(count - len(bullets)):
+        x = game.rng.uniform(0, SCREEN_RECT.width - bullets.width)
+        y = game.rng.uniform(0, SCREEN_RECT.height)
+        bullets.spawn(x, y, 0, 3 * game.speed_multiplier)
+
+
+def max_power(game):
+    """保持三发子弹"""
+    game.hero.power_level = game.hero.max_power
+    game.hero.power_time = game.game_clock.get_ticks()
+
+
+def crowd(game):
+    fill_enemies(game, 40)
+    fill_enemy_bullets(game, 500)
+
+
+def triple_shot(game):
+    max_power(game)
+    fill_enemies(game, 20)
+
+
+def late_game(game):
+    game.speed_multiplier = 3.0
+    max_power(game)
+    fill_enemies(game, 30)
+
+
+def fire_wave(game):
+    fill_enemies(game, 40)
+    for enemy in game.enemy_group:
+        if enemy.shot_event is None:
+            enemy.can_shoot = True
+            enemy.shot_delay = 200
+            game.schedule_enemy_fire(enemy)
+
+
+def bullet_hell(game):
+    fill_enemy_bullets(game, 3000)
+
+
+# 场景名 -> 每帧执行的准备函数
+SCENARIOS = {
+    "crowd": crowd,
+    "triple_shot": triple_shot,
+    "late_game": late_game,
+    "fire_wave": fire_wave,
+    "bullet_hell": bullet_hell,
+}
+
+
+def run_scenario(name, frames=FRAMES, render=True):
+    """运行一个场景，返回每秒帧数和各阶段平均耗时"""
+    prepare = SCENARIOS[name]
+    game = PlaneGame(headless=True, seed=2024)
+    game.render = render
+    game.god_mode = True
+    game.win_score = float("inf")
+    game.profiler.enabled = True
+    game.profiler.window = frames
+    start = time.perf_counter()
+    for i in range(frames):
+        prepare(game)
+        game.step(1, HERO_INPUTS[i % len(HERO_INPUTS)])
+    elapsed = time.perf_counter() - start
+    phases = {phase: round(stats["mean"], 4) for phase, stats in game.profiler.summary().items()}
+    return {"fps": round(frames / elapsed, 1), "phases": phases, "counts": game.profiler.counts}
+
+
+def measure_startup(runs=5):
+    """多次冷启动取中位数（毫秒），total包含解释器启动"""
+    env = dict(os.environ, SDL_VIDEODRIVER="dummy")
+    cwd = os.path.dirname(os.path.abspath(__file__))
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        output = subprocess.run([sys.executable, "-c", STARTUP_SCRIPT], env=env, cwd=cwd,
+                                capture_output=True, text=True, check=True).stdout
+        total = (time.perf_counter() - start) * 1000
+        sample = json.loads(output.strip().splitlines()[-1])
+        sample["total"] = total
+        samples.append(sample)
+    return {name: round(statistics.median(sample[name] for sample in samples), 1) for name in samples[0]}
+
+
+def load_baseline(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="游戏主循环压力测试")
+    parser.add_argument("scenarios", nargs="*", help="要运行的场景（默认全部）")
+    parser.add_argument("--frames", type=int, default=FRAMES)
+    parser.add_argument("--no-render", action="store_true", help="只测游戏逻辑，不绘制")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--threshold", type=float, default=0.15, help="帧率低于基线多少比例算退化")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--phases", action="store_true", help="输出各阶段平均耗时")
+    parser.add_argument("--startup", action="store_true", help="只测量冷启动时间")
+    parser.add_argument("--startup-budget", type=float, default=STARTUP_BUDGET_MS, help="冷启动时间预算（毫秒）")
+    args = parser.parse_args()
+
+    if args.startup:
+        result = measure_startup()
+        print("  ".join(f"{name} {ms:.1f} ms" for name, ms in result.items()))
+        if result["total"] > args.startup_budget:
+            print(f"冷启动超出预算 {args.startup_budget:.0f} ms")
+            sys.exit(1)
+        return
+
+    names = args.scenarios or list(SCENARIOS)
+    baseline = load_baseline(args.baseline)
+    results = {}
+    regressions = []
+    for name in names:
+        result = run_scenario(name, args.frames, render=not args.no_render)
+        results[name] = result
+        base = baseline.get(name, {}).get("fps")
+        line = f"{name:12s} {result['fps']:9.1f} fps"
+        if base:
+            change = result["fps"] / base - 1
+            line += f"  基线 {base:9.1f}  {change:+.1%}"
+            if change < -args.threshold:
+                line += "  <-- 退化"
+                regressions.append(name)
+        print(line)
+        if args.phases:
+            for phase, mean in sorted(result["phases"].items(), key=lambda item: -item[1]):
+                print(f"    {phase:20s} {mean:.4f} ms")
+
+    if args.save_baseline:
+        baseline.update({name: {"fps": result["fps"]} for name, result in results.items()})
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, ensure_ascii=False)
+        print("基线已保存:", args.baseline)
+    elif regressions:
+        print("性能退化:", ", ".join(regressions))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
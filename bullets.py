@@ -0,0 +1,226 @@
+import numpy as np
+import pygame
+
+
+def _slab(start, size, delta, low, high):
+    """一个轴上[start, start + size)每步移动delta时与[low, high)重叠的时间区间(进入, 离开)
+
+    时间以步为单位；不动的按是否已重叠给出(-inf, inf)或空区间。
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t0 = (low - size - start) / delta
+        t1 = (high - start) / delta
+    enter = np.minimum(t0, t1)
+    leave = np.maximum(t0, t1)
+    still = delta == 0
+    if still.any():
+        inside = (start < high) & (start + size > low)
+        enter = np.where(still, np.where(inside, -np.inf, np.inf), enter)
+        leave = np.where(still, np.where(inside, np.inf, -np.inf), leave)
+    return enter, leave
+
+
+class BulletArray(object):
+    """结构数组形式的子弹组
+
+    位置、速度和存活标志保存在预分配的NumPy数组里，移动和出界剔除一次向量化完成，
+    绘制用一次Surface.blits批量提交。接口与精灵组相同（update/draw/empty/len），
+    可以直接放进原来的精灵组更新流程。
+    """
+
+    def __init__(self, image, bounds, capacity=1024):
+        self.image = image
+        self.width, self.height = image.get_size()
+        self.bounds = bounds
+        self.pos = np.zeros((capacity, 2))  # 左上角坐标
+        self.prev_pos = np.zeros((capacity, 2))  # 上一次模拟时的坐标（渲染插值用）
+        self.vel = np.zeros((capacity, 2))  # 每帧位移
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.wake = np.zeros(capacity)  # 在这个时刻之前碰不到目标，不用检测
+        self.count = 0  # [0, count)内是已使用的槽位
+        self.time = 0.0  # 累计的模拟时间（标准帧）
+        self.step = 0.0  # 上一步单颗子弹在一个轴上的最大位移
+        self.__speed = 0.0  # 生成过的子弹在一个轴上的最大速度
+        self.__guard = None  # 计算休眠时假定目标所在的范围
+
+    @property
+    def capacity(self):
+        return len(self.alive)
+
+    def __len__(self):
+        return int(np.count_nonzero(self.alive[:self.count]))
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def __grow(self):
+        """容量不够时翻倍"""
+        capacity = self.capacity * 2
+        self.pos = np.resize(self.pos, (capacity, 2))
+        self.prev_pos = np.resize(self.prev_pos, (capacity, 2))
+        self.vel = np.resize(self.vel, (capacity, 2))
+        self.wake = np.resize(self.wake, capacity)
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:self.count] = self.alive[:self.count]
+        self.alive = alive
+
+    def spawn(self, x, y, vx, vy):
+        """在左上角(x, y)生成一颗子弹，返回槽位下标"""
+        if self.count == self.capacity:
+            self.__compact()
+            if self.count == self.capacity:
+                self.__grow()
+        index = self.count
+        self.pos[index] = (x, y)
+        self.prev_pos[index] = (x, y)
+        self.vel[index] = (vx, vy)
+        self.__speed = max(self.__speed, abs(vx), abs(vy))
+        self.wake[index] = -np.inf
+        self.alive[index] = True
+        self.count += 1
+        return index
+
+    def kill(self, indices):
+        """删除指定下标的子弹"""
+        self.alive[indices] = False
+
+    def empty(self):
+        self.alive[:self.count] = False
+        self.count = 0
+        self.__guard = None
+        self.__speed = 0.0
+
+    def __compact(self):
+        """把存活的子弹挤到数组前部"""
+        n = self.count
+        alive = self.alive[:n]
+        live = int(np.count_nonzero(alive))
+        if live == n:
+            return
+        self.pos[:live] = self.pos[:n][alive]
+        self.prev_pos[:live] = self.prev_pos[:n][alive]
+        self.vel[:live] = self.vel[:n][alive]
+        self.wake[:live] = self.wake[:n][alive]
+        self.alive[:live] = True
+        self.alive[live:n] = False
+        self.count = live
+
+    def update(self, dt=1.0):
+        """移动所有子弹并剔除飞出屏幕的，dt以标准帧为单位"""
+        self.time += dt
+        self.step = self.__speed * dt
+        n = self.count
+        if not n:
+            return
+        pos = self.pos[:n]
+        self.prev_pos[:n] = pos
+        pos += self.vel[:n] * dt
+        y = pos[:, 1]
+        self.alive[:n] &= (y <= self.bounds.bottom) & (y + self.height >= self.bounds.top)
+        self.__compact()
+
+    def collide_rect(self, rect):
+        """返回与rect相交的存活子弹下标"""
+        n = self.count
+        if not n:
+            return np.empty(0, dtype=np.intp)
+        x = self.pos[:n, 0]
+        y = self.pos[:n, 1]
+        hit = (self.alive[:n] & (x < rect.right) & (x + self.width > rect.left)
+               & (y < rect.bottom) & (y + self.height > rect.top))
+        return np.flatnonzero(hit)
+
+    def sweep(self, rect, margin=0):
+        """这一步的移动路径（prev_pos到pos）与rect相交的子弹，返回(下标, 进入时间, 离开时间)
+
+        时间是这一步内的比例[0, 1]，速度再快也不会穿过rect。
+        假定目标在rect外扩margin的范围内活动：没碰到的子弹按最早能进入这个范围的时刻休眠，
+        休眠期间不再检测；目标离开这个范围时全部唤醒。
+        """
+        n = self.count
+        guard = self.__guard
+        if guard is None or not guard.contains(rect):
+            guard = self.__guard = rect.inflate(margin * 2, margin * 2)
+            self.wake[:n] = -np.inf
+        awake = np.flatnonzero(self.alive[:n] & (self.wake[:n] <= self.time))
+        if not len(awake):
+            return awake, np.empty(0), np.empty(0)
+        start = self.prev_pos[awake]
+        delta = self.pos[awake] - start
+        enter_x, leave_x = _slab(start[:, 0], self.width, delta[:, 0], rect.left, rect.right)
+        enter_y, leave_y = _slab(start[:, 1], self.height, delta[:, 1], rect.top, rect.bottom)
+        enter = np.maximum(np.maximum(enter_x, enter_y), 0.0)
+        leave = np.minimum(np.minimum(leave_x, leave_y), 1.0)
+        hit = enter < leave
+
+        missed = awake[~hit]
+        if len(missed):
+            pos = self.pos[missed]
+            vel = self.vel[missed]
+            enter_x, leave_x = _slab(pos[:, 0], self.width, vel[:, 0], guard.left, guard.right)
+            enter_y, leave_y = _slab(pos[:, 1], self.height, vel[:, 1], guard.top, guard.bottom)
+            reach = np.maximum(enter_x, enter_y)
+            until = np.minimum(leave_x, leave_y)
+            # 永远进不了范围的一直休眠；提前一步醒来，留出浮点误差的余量
+            reach = np.where((reach < until) & (until > 0), reach, np.inf)
+            self.wake[missed] = self.time + reach - 1.0
+        return awake[hit], enter[hit], leave[hit]
+
+    def __slow(self):
+        """一步的位移小于子弹尺寸时只比较当前位置也不会漏掉，比扫掠检测少很多NumPy操作"""
+        return self.step < min(self.width, self.height)
+
+    def collide_swept(self, rect, margin=0):
+        """这一步移动路径与rect相交的子弹下标"""
+        if self.__slow():
+            return self.collide_rect(rect)
+        return self.sweep(rect, margin)[0]
+
+    def collide_mask(self, rect, mask, bullet_mask, margin=0):
+        """先按移动路径筛选，再在重叠的时间段内逐点比较掩码（mask位于rect处），返回命中的下标"""
+        if self.__slow():
+            candidates = self.collide_rect(rect)
+            if not len(candidates):
+                return candidates
+            corners = np.floor(self.pos[candidates]).astype(int) - (rect.x, rect.y)
+            hit = [mask.overlap(bullet_mask, offset) is not None for offset in map(tuple, corners.tolist())]
+            return candidates[np.array(hit, dtype=bool)]
+        candidates, enter, leave = self.sweep(rect, margin)
+        if not len(candidates):
+            return candidates
+        start = self.prev_pos[candidates]
+        delta = self.pos[candidates] - start
+        # 每颗子弹在重叠时间段内采样，相邻采样点之间的位移不超过子弹尺寸的一半
+        spacing = max(1, min(self.width, self.height) // 2)
+        samples = (np.abs(delta).max(axis=1) * (leave - enter) / spacing).astype(int) + 2
+        owner = np.repeat(np.arange(len(candidates)), samples)
+        first = np.cumsum(samples) - samples
+        fraction = (np.arange(len(owner)) - first[owner]) / (samples[owner] - 1)
+        t = enter[owner] + (leave - enter)[owner] * fraction
+        corners = np.floor(start[owner] + delta[owner] * t[:, None]).astype(int) - (rect.x, rect.y)
+        overlap = mask.overlap
+        touched = np.array([overlap(bullet_mask, offset) is not None for offset in map(tuple, corners.tolist())])
+        hit = np.logical_or.reduceat(touched, first)
+        return candidates[hit]
+
+    def positions(self, alpha=1.0):
+        """存活子弹的整数坐标，alpha为上一次到这一次模拟之间的插值比例"""
+        n = self.count
+        alive = self.alive[:n]
+        pos = self.pos[:n][alive]
+        if alpha != 1.0:
+            prev = self.prev_pos[:n][alive]
+            pos = prev + (pos - prev) * alpha
+        return np.floor(pos).astype(int)
+
+    def rects(self, alpha=1.0):
+        """存活子弹所占的矩形"""
+        width, height = self.width, self.height
+        return [pygame.Rect(x, y, width, height) for x, y in self.positions(alpha).tolist()]
+
+    def draw(self, surface, alpha=1.0):
+        """一次blits调用画出所有子弹"""
+        if not self.count:
+            return
+        image = self.image
+        surface.blits([(image, pos) for pos in self.positions(alpha).tolist()], doreturn=False)
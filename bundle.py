@@ -0,0 +1,138 @@
+"""图片资源包：把所有图片预先解码成一张图集，启动时内存映射直接使用
+
+    python bundle.py            # 打包游戏目录下的全部png/jpg到assets.bundle
+文件格式：8字节标识、4字节版本、4字节索引长度、JSON索引，然后是16字节对齐的像素数据。
+像素是32位BGRA（与convert_alpha后的显示格式相同），所有图片按行排进一张图集，
+索引记录每张图片在图集中的矩形、是否带透明通道和源文件的CRC（源文件改过时不再使用）。
+"""
+import argparse
+import json
+import mmap
+import os
+import struct
+import zlib
+
+import pygame
+
+# 图片和资源包都在游戏目录下，与当前工作目录无关
+ASSET_DIR = os.path.dirname(os.path.abspath(__file__))
+BUNDLE_PATH = os.path.join(ASSET_DIR, "assets.bundle")
+MAGIC = b"PLANEBND"
+VERSION = 1
+HEADER = struct.Struct("<8sII")
+ALIGN = 16
+IMAGE_EXTENSIONS = (".png", ".jpg")
+
+
+def source_crc(path):
+    with open(path, "rb") as f:
+        return zlib.crc32(f.read())
+
+
+def layout(sizes):
+    """按高度从高到低逐行排放，返回(图集宽, 图集高, [各图片的(x, y)])"""
+    width = max(w for w, _ in sizes)
+    positions = [None] * len(sizes)
+    x = y = row_height = 0
+    for index in sorted(range(len(sizes)), key=lambda i: -sizes[i][1]):
+        w, h = sizes[index]
+        if x + w > width:
+            x, y, row_height = 0, y + row_height, 0
+        positions[index] = (x, y)
+        x += w
+        row_height = max(row_height, h)
+    return width, y + row_height, positions
+
+
+def pack(root, names, path):
+    """把root下的names（相对路径）解码后写成资源包，返回索引"""
+    images = [pygame.image.load(os.path.join(root, name)) for name in names]
+    width, height, positions = layout([image.get_size() for image in images])
+    # 逐行拷贝像素，不经过blit，半透明像素保持原值
+    pixels = bytearray(width * height * 4)
+    entries = {}
+    for name, image, (x, y) in zip(names, images, positions):
+        w, h = image.get_size()
+        data = pygame.image.tobytes(image, "BGRA")
+        for row in range(h):
+            start = ((y + row) * width + x) * 4
+            pixels[start:start + w * 4] = data[row * w * 4:(row + 1) * w * 4]
+        entries[name] = {"rect": [x, y, w, h], "alpha": bool(image.get_flags() & pygame.SRCALPHA),
+                         "crc": source_crc(os.path.join(root, name))}
+    index = {"width": width, "height": height, "images": entries}
+    index_bytes = json.dumps(index, sort_keys=True).encode("utf-8")
+    offset = HEADER.size + len(index_bytes)
+    offset += -offset % ALIGN
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(index_bytes)))
+        f.write(index_bytes)
+        f.write(b"\0" * (offset - f.tell()))
+        f.write(pixels)
+    return index
+
+
+class AssetBundle(object):
+    """内存映射的资源包，图片是图集的子Surface，像素直接引用映射的内存
+
+    映射是写时复制的，就算有人往图片上画也不会改动文件。
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.__map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        if len(self.__map) < HEADER.size:
+            raise ValueError(f"不是可用的资源包: {path}")
+        magic, version, index_length = HEADER.unpack_from(self.__map)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"不是可用的资源包: {path}")
+        offset = HEADER.size + index_length
+        self.offset = offset + -offset % ALIGN
+        try:
+            self.index = json.loads(self.__map[HEADER.size:HEADER.size + index_length])
+            width, height = self.index["width"], self.index["height"]
+            rects = [pygame.Rect(entry["rect"]) for entry in self.index["images"].values()]
+        except (KeyError, TypeError) as e:
+            raise ValueError(f"资源包索引损坏: {path}") from e
+        # 文件被截断或索引越界时，图集和子Surface要到第一次取图时才会出错，这里提前拒绝
+        atlas = pygame.Rect(0, 0, width, height)
+        if len(self.__map) < self.offset + width * height * 4 or not all(map(atlas.contains, rects)):
+            raise ValueError(f"资源包不完整: {path}")
+        self.__atlas = None
+
+    @property
+    def atlas(self):
+        if self.__atlas is None:
+            width, height = self.index["width"], self.index["height"]
+            pixels = memoryview(self.__map)[self.offset:self.offset + width * height * 4]
+            self.__atlas = pygame.image.frombuffer(pixels, (width, height), "BGRA")
+        return self.__atlas
+
+    def __contains__(self, name):
+        return name in self.index["images"]
+
+    def has_alpha(self, name):
+        return self.index["images"][name]["alpha"]
+
+    def is_current(self, name, source_path):
+        """源文件和打包时相同（源文件不在时以包为准）"""
+        if not os.path.exists(source_path):
+            return True
+        return source_crc(source_path) == self.index["images"][name]["crc"]
+
+    def image(self, name):
+        return self.atlas.subsurface(self.index["images"][name]["rect"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="把图片打包成资源包")
+    parser.add_argument("images", nargs="*", help="要打包的图片（相对游戏目录，默认全部png/jpg）")
+    parser.add_argument("--out", default=BUNDLE_PATH)
+    args = parser.parse_args()
+    names = args.images or sorted(name for name in os.listdir(ASSET_DIR) if name.endswith(IMAGE_EXTENSIONS))
+    index = pack(ASSET_DIR, names, args.out)
+    print(f"{len(names)} 张图片，图集 {index['width']}x{index['height']}，"
+          f"{os.path.getsize(args.out) / 1024:.0f} KB -> {args.out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,185 @@
+from operator import attrgetter
+
+import pygame
+
+from assets import assets
+
+# 碰撞检测方式：只比较矩形，或矩形相交后再比较像素掩码
+RECT = "rect"
+MASK = "mask"
+
+
+def prev_rect(sprite):
+    """上一次模拟时精灵所在的矩形（直接改过rect的精灵就是当前矩形）"""
+    x, y = sprite.draw_pos(0.0)
+    return pygame.Rect(x, y, sprite.rect.width, sprite.rect.height)
+
+
+def swept_rect(sprite):
+    """精灵这一步移动扫过的范围（没动时就是sprite.rect本身）"""
+    rect = sprite.rect
+    x, y = sprite.draw_pos(0.0)
+    if x == rect.x and y == rect.y:
+        return rect
+    return rect.union((x, y, rect.width, rect.height))
+
+
+def _impact(a, ax, ay, b, bx, by):
+    """time_of_impact的实现，(ax, ay)和(bx, by)是两者上一次的左上角"""
+    ra, rb = a.rect, b.rect
+    enter, leave = 0.0, 1.0
+    for start, size, delta, low, high in (
+            (ax, ra.width, (ra.x - ax) - (rb.x - bx), bx, bx + rb.width),
+            (ay, ra.height, (ra.y - ay) - (rb.y - by), by, by + rb.height)):
+        if delta == 0:
+            if start >= high or start + size <= low:
+                return None
+            continue
+        t0 = (low - size - start) / delta
+        t1 = (high - start) / delta
+        if t0 > t1:
+            t0, t1 = t1, t0
+        enter = max(enter, t0)
+        leave = min(leave, t1)
+        if enter >= leave:
+            return None
+    return enter, leave
+
+
+def time_of_impact(a, b):
+    """两个精灵这一步内矩形重叠的时间区间(进入, 离开)，不重叠返回None
+
+    两者都从上一次的矩形匀速移动到当前矩形，按a相对b的位移逐轴求解，
+    时间是这一步内的比例[0, 1]。速度再快也不会互相穿过。
+    """
+    return _impact(a, *a.draw_pos(0.0), b, *b.draw_pos(0.0))
+
+
+class SweptCollide(object):
+    """两段式碰撞检测，可作为pygame.sprite.spritecollide等的collided参数
+
+    先按这一步的移动路径求矩形重叠的时间段，重叠时再在这段时间内逐点比较缓存的掩码；
+    方式为RECT的一方使用整块矩形掩码，两方都是RECT时只看矩形。
+    """
+
+    def __init__(self, mode_a=MASK, mode_b=MASK):
+        self.mode_a = mode_a
+        self.mode_b = mode_b
+
+    @staticmethod
+    def mask(sprite, mode):
+        if mode == MASK:
+            return assets.mask(sprite.image)
+        return assets.rect_mask(sprite.rect.size)
+
+    def __call__(self, a, b):
+        ra, rb = a.rect, b.rect
+        ax, ay = a.draw_pos(0.0)
+        bx, by = b.draw_pos(0.0)
+        both_rect = self.mode_a == RECT and self.mode_b == RECT
+        if ax == ra.x and ay == ra.y and bx == rb.x and by == rb.y:
+            # 这一步都没有移动，只比较当前位置
+            if not ra.colliderect(rb):
+                return False
+            if both_rect:
+                return True
+            return self.mask(a, self.mode_a).overlap(self.mask(b, self.mode_b), (rb.x - ra.x, rb.y - ra.y)) is not None
+        toi = _impact(a, ax, ay, b, bx, by)
+        if toi is None:
+            return False
+        if both_rect:
+            return True
+        mask_a, mask_b = self.mask(a, self.mode_a), self.mask(b, self.mode_b)
+        enter, leave = toi
+        dx = (rb.x - bx) - (ra.x - ax)
+        dy = (rb.y - by) - (ra.y - ay)
+        # 相邻采样点之间的相对位移不超过较小一方尺寸的一半
+        spacing = max(1, min(ra.width, ra.height, rb.width, rb.height) // 2)
+        samples = int(max(abs(dx), abs(dy)) * (leave - enter) / spacing) + 1
+        for k in range(samples + 1):
+            t = enter + (leave - enter) * k / samples
+            offset = (round(bx - ax + dx * t), round(by - ay + dy * t))
+            if mask_a.overlap(mask_b, offset) is not None:
+                return True
+        return False
+
+
+_colliders = {}
+
+
+def collider(mode_a, mode_b):
+    """按两类实体的检测方式返回collided函数（同一组合共用一个）"""
+    key = (mode_a, mode_b)
+    collide = _colliders.get(key)
+    if collide is None:
+        collide = _colliders[key] = SweptCollide(mode_a, mode_b)
+    return collide
+
+
+class Broadphase(object):
+    """粗检测：先按矩形筛出候选精灵，再交给collided精确检测
+
+    area给出精灵参与检测的矩形，默认是sprite.rect；传swept_rect时按整步的移动范围登记。
+    查询直接用Rect.collidelistall逐个比较：敌机最多ENEMY_POLICY的上限个，
+    这个数量下C循环比按格子登记和查找都快，所以不再分格子。
+    """
+
+    def __init__(self, area=attrgetter("rect")):
+        self.area = area
+        self.__sprites = []  # 按插入顺序登记的精灵和矩形
+        self.__areas = []
+
+    def clear(self):
+        self.__sprites.clear()
+        self.__areas.clear()
+
+    def insert(self, sprite):
+        self.__sprites.append(sprite)
+        self.__areas.append(self.area(sprite))
+
+    def build(self, sprites):
+        """每帧重新登记"""
+        self.clear()
+        self.__sprites.extend(sprites)
+        self.__areas.extend([self.area(sprite) for sprite in self.__sprites])
+
+    def query(self, rect):
+        """返回与rect相交的精灵，顺序与插入顺序一致"""
+        sprites = self.__sprites
+        return [sprites[i] for i in rect.collidelistall(self.__areas)]
+
+    def collide(self, sprite, collided=None):
+        """已登记的精灵中与sprite相撞的（先比较area矩形，collided不为None时再用它精确检测）"""
+        hits = self.query(self.area(sprite))
+        if collided is not None and hits:
+            hits = [other for other in hits if collided(sprite, other)]
+        return hits
+
+    def groupcollide(self, group_a, group_b, dokilla, dokillb, collided=None, rebuild=True):
+        """与pygame.sprite.groupcollide结果相同，但只对矩形相交的候选对调用collided
+
+        collided不为None时，矩形（按area）相交的候选对再用它精确检测。
+        rebuild为False时沿用已经按group_b登记的精灵。
+        """
+        crashed = {}
+        if not group_a or not group_b:
+            return crashed
+        if rebuild:
+            self.build(group_b)
+        killed = set()
+        for sprite in group_a.sprites():
+            hits = self.query(self.area(sprite))
+            if killed:
+                # 已被删除的精灵不能再被后面的检测命中
+                hits = [other for other in hits if other not in killed]
+            if collided is not None and hits:
+                hits = [other for other in hits if collided(sprite, other)]
+            if hits:
+                crashed[sprite] = hits
+                if dokilla:
+                    sprite.kill()
+                if dokillb:
+                    for other in hits:
+                        other.kill()
+                    killed.update(hits)
+        return crashed
@@ -3,67 +3,37 @@ import time
 import pygame
 import random
 
-# 游戏屏幕的尺寸
-SCREEN_RECT = pygame.Rect(0, 0, 433, 650)
-# 游戏的刷新帧率
-FRAME_PER_SEC = 60
+import core
+from assets import assets
+from entities import blit_sprites
+from core import (SCREEN_RECT, FRAME_PER_SEC, RED, WHITE, BLACK, FONT_LARGE, FONT_SMALL, get_font,
+                  Background, GameSprite)
+
 # 敌机的定时器常量
 CREATE_ENEMY_EVENT = pygame.USEREVENT
 # 敌机发射子弹事件
 ENEMY_FIRE_EVENT = pygame.USEREVENT + 1
+CAPTION = "飞机游戏"
 
-pygame.font.init()
-font = pygame.font.Font(None, 60)
-font2 = pygame.font.Font(None, 20)
-RED = (255, 0, 0)
-WHITE = (255, 255, 255)
-BLACK = (0, 0, 0)
-pygame.display.set_caption("飞机游戏")
-
-
-class GameSprite(pygame.sprite.Sprite):
-    """游戏精灵基类"""
-
-    def __init__(self, image_name, speed=1):
-        super().__init__()
-        self.image = pygame.image.load(image_name)
-        self.rect = self.image.get_rect()
-        self.speed = speed
-
-    def update(self, *args):
-        self.rect.y += self.speed
-
-
-class Background(GameSprite):
-    """游戏背景精灵"""
 
-    def __init__(self, is_alt=False):
-        image_name = "./background.jpg"
-        super().__init__(image_name)
-        if is_alt:
-            self.rect.y = -self.rect.height
+class Enemy(core.Enemy):
+    """经典规则的敌机：速度慢，没有强化敌机
 
-    def update(self, *args):
-        super().update()
-        if self.rect.y >= SCREEN_RECT.height:
-            self.rect.y = -self.rect.height
+    射击不看can_shoot：ENEMY_FIRE_EVENT时每架敌机按自己的射击间隔调用shoot()。
+    经典规则的子弹是精灵而不是子弹数组，所以不用基类的fire(now, bullets)。
+    """
 
-
-class Enemy(GameSprite):
-    """敌机精灵"""
-
-    def __init__(self, speed_multiplier=1.0):
-        super().__init__("./enemy.png")
+    def reset(self, speed_multiplier=1.0, rng=random, base_shoot=0.3):
+        super().reset(speed_multiplier, rng, base_shoot)
+        self.image = assets.load("./enemy.png")
+        self.is_powerup = False
         self.base_speed = 0.5
         self.speed = self.base_speed * speed_multiplier
-        self.rect.bottom = 0
-        max_x = SCREEN_RECT.width - self.rect.width
-        self.rect.x = random.randint(0, max_x)
         self.last_shot = pygame.time.get_ticks()
-        self.shot_delay = random.randint(1500, 3000)
+        self.shot_delay = rng.randint(1500, 3000)
 
-    def fire(self):
-        now = pygame.time.get_ticks()
+    def shoot(self, now):
+        """到了射击间隔就返回一颗敌机子弹精灵，否则返回None"""
         if now - self.last_shot > self.shot_delay:
             self.last_shot = now
             bullet = EnemyBullet()
@@ -80,26 +50,21 @@ class EnemyBullet(GameSprite):
         super().__init__("./zidan.png", 3)  # 使用专门的敌机子弹图片
         self.damage = 1
 
-    def update(self, *args):
-        super().update()
+    def update(self, dt=1.0):
+        super().update(dt)
         if self.rect.top > SCREEN_RECT.height:
             self.kill()
 
 
-class Hero(GameSprite):
-    """英雄精灵"""
+class Hero(core.Hero):
+    """经典规则的英雄：跟随鼠标不下沉，只有单发快速子弹"""
 
     def __init__(self):
-        super().__init__("./air.png", 0)
-        self.rect.centerx = SCREEN_RECT.centerx
-        self.rect.bottom = SCREEN_RECT.bottom - 120
-        self.bullets = pygame.sprite.Group()
-        self.last_shot = 0
+        super().__init__()
+        self.speed = 0
         self.shot_delay = 200
-        self.is_dead = False
 
-    def fire(self):
-        now = pygame.time.get_ticks()
+    def fire(self, now):
         if now - self.last_shot > self.shot_delay:
             self.last_shot = now
             bullet = Bullet()
@@ -107,30 +72,25 @@ class Hero(GameSprite):
             bullet.rect.centerx = self.rect.centerx
             self.bullets.add(bullet)
 
-    def die(self):
-        self.is_dead = True
-
 
-class Bullet(GameSprite):
-    """子弹精灵"""
+class Bullet(core.Bullet):
+    """经典规则的子弹：速度更快"""
 
     def __init__(self):
-        super().__init__("./zidan.png", -8)
+        super().__init__()
+        self.speed = -8
         self.damage = 1
 
-    def update(self, *args):
-        super().update()
-        if self.rect.bottom < 0:
-            self.kill()
-
 
 class PlaneGame(object):
     """飞机大战主游戏"""
 
     def __init__(self):
         print("游戏初始化..")
-        pygame.init()
+        pygame.display.init()
         self.screen = pygame.display.set_mode(SCREEN_RECT.size)
+        pygame.display.set_caption(CAPTION)
+        assets.convert_all()
         self.clock = pygame.time.Clock()
         self.__create_sprites()
         pygame.time.set_timer(CREATE_ENEMY_EVENT, 1000)
@@ -174,8 +134,9 @@ class PlaneGame(object):
                     enemy = Enemy(self.speed_multiplier)
                     self.enemy_group.add(enemy)
                 elif event.type == ENEMY_FIRE_EVENT and not self.is_game_over:
+                    now = pygame.time.get_ticks()
                     for enemy in self.enemy_group:
-                        bullet = enemy.fire()
+                        bullet = enemy.shoot(now)
                         if bullet:
                             self.enemy_bullets.add(bullet)
                 elif event.type == pygame.KEYDOWN and self.is_game_over:
@@ -212,16 +173,12 @@ class PlaneGame(object):
 
     def __update_sprites(self):
         """更新精灵组"""
-        self.back_group.update()
-        self.back_group.draw(self.screen)
-        self.enemy_group.update()
-        self.enemy_group.draw(self.screen)
-        self.hero_group.update()
-        self.hero_group.draw(self.screen)
-        self.hero.bullets.update()
-        self.hero.bullets.draw(self.screen)
-        self.enemy_bullets.update()
-        self.enemy_bullets.draw(self.screen)
+        groups = (self.back_group, self.enemy_group, self.hero_group, self.hero.bullets, self.enemy_bullets)
+        for group in groups:
+            group.update()
+        # 按层用一次blits画出每组精灵
+        for group in groups:
+            blit_sprites(self.screen, group)
 
         # 控制英雄移动
         if not self.is_game_over and not self.hero.is_dead:
@@ -245,9 +202,10 @@ class PlaneGame(object):
 
     def __show_difficulty(self, elapsed_time):
         """显示游戏信息"""
-        time_text = font2.render(f"Time: {int(elapsed_time)}s", True, BLACK)
-        speed_text = font2.render(f"Speed: x{self.speed_multiplier:.1f}", True, BLACK)
-        score_text = font2.render(f"Score: {self.score}", True, BLACK)
+        font = get_font(FONT_SMALL)
+        time_text = font.render(f"Time: {int(elapsed_time)}s", True, BLACK)
+        speed_text = font.render(f"Speed: x{self.speed_multiplier:.1f}", True, BLACK)
+        score_text = font.render(f"Score: {self.score}", True, BLACK)
 
         self.screen.blit(time_text, (5, 5))
         self.screen.blit(speed_text, (5, 25))
@@ -259,6 +217,7 @@ class PlaneGame(object):
         s.fill((0, 0, 0, 180))
         self.screen.blit(s, (0, 0))
 
+        font = get_font(FONT_LARGE)
         game_over = font.render("GAME OVER", True, RED)
         restart = font.render("Press R to restart", True, WHITE)
         quit_text = font.render("Press Q to quit", True, WHITE)
@@ -0,0 +1,233 @@
+"""游戏的公共部分：屏幕常量、字体和精灵类，main.py和com.py共用
+
+导入本模块没有副作用：不初始化pygame、不创建字体、不需要显示设备。
+字体在第一次使用时才创建，图片在窗口创建后才转换。
+"""
+import math
+
+import pygame
+import random
+
+from assets import assets
+from effects import Backdrop
+from pool import SpritePool
+
+# 游戏屏幕的尺寸
+SCREEN_RECT = pygame.Rect(0, 0, 433, 650)
+# 游戏的刷新帧率
+FRAME_PER_SEC = 60
+RED = (255, 0, 0)
+WHITE = (255, 255, 255)
+BLACK = (0, 0, 0)
+# 标题和信息栏的字号
+FONT_LARGE = 60
+FONT_SMALL = 20
+# 强化敌机的标记（绿色底）
+POWERUP_EFFECTS = (Backdrop((0, 255, 0)),)
+# 子弹和敌机对象池空闲列表的上限
+BULLET_POOL_SIZE = 128
+ENEMY_POOL_SIZE = 64
+
+_fonts = {}
+
+
+def get_font(size):
+    """按字号返回默认字体，第一次使用时才初始化字体模块"""
+    font = _fonts.get(size)
+    if font is None:
+        if not pygame.font.get_init():
+            pygame.font.init()
+        font = _fonts[size] = pygame.font.Font(None, size)
+    return font
+
+
+class GameSprite(pygame.sprite.Sprite):
+    """游戏精灵基类"""
+
+    def __init__(self, image_name, speed=1):
+        super().__init__()
+        self.image = assets.load(image_name)
+        self.rect = self.image.get_rect()
+        self.speed = speed
+        self.pool = None  # 所属对象池，kill时自动回收
+        self.sync_pos()
+
+    def sync_pos(self):
+        """以rect为准重置浮点坐标（出生、瞬移等直接改rect的情况）"""
+        self.pos = pygame.math.Vector2(self.rect.topleft)
+        self.prev_pos = pygame.math.Vector2(self.pos)
+        self.__synced = self.rect.topleft
+
+    def move(self, dx, dy):
+        """按浮点坐标移动，rect取整，小数部分不会丢失"""
+        if self.rect.topleft != self.__synced:
+            self.sync_pos()
+        self.prev_pos.update(self.pos)
+        self.pos.x += dx
+        self.pos.y += dy
+        self.rect.topleft = self.__synced = (math.floor(self.pos.x), math.floor(self.pos.y))
+
+    def draw_pos(self, alpha=1.0):
+        """上一次和这一次模拟之间按alpha插值的绘制位置"""
+        if self.rect.topleft != self.__synced:
+            return self.rect.topleft
+        prev, pos = self.prev_pos, self.pos
+        return (math.floor(prev.x + (pos.x - prev.x) * alpha),
+                math.floor(prev.y + (pos.y - prev.y) * alpha))
+
+    def update(self, dt=1.0):
+        """dt以标准帧(1/60秒)为单位"""
+        self.move(0, self.speed * dt)
+
+    def kill(self):
+        was_alive = self.alive()
+        super().kill()
+        if was_alive and self.pool is not None:
+            self.pool.release(self)
+
+
+class Background(GameSprite):
+    """游戏背景精灵"""
+
+    def __init__(self, is_alt=False):
+        image_name = "./background.jpg"
+        super().__init__(image_name)
+        if is_alt:
+            self.rect.y = -self.rect.height
+
+    def update(self, dt=1.0):
+        super().update(dt)
+        if self.rect.y >= SCREEN_RECT.height:
+            self.rect.y = -self.rect.height
+
+
+class Enemy(GameSprite):
+    """敌机精灵"""
+    def __init__(self, speed_multiplier=1.0, rng=random, base_shoot=0.3):
+        super().__init__("./enemy.png")
+        self.reset(speed_multiplier, rng, base_shoot)
+
+    def reset(self, speed_multiplier=1.0, rng=random, base_shoot=0.3):
+        """初始化/重置敌机状态（对象池复用时调用）"""
+        self.image = assets.load("./enemy.png")
+        self.rect = self.image.get_rect()
+        self.base_speed = 4  # 以前每帧被enemy_group和powerup_group各更新一次，保持原来的实际速度
+        self.speed = self.base_speed * speed_multiplier
+        self.rect.bottom = 0
+        max_x = SCREEN_RECT.width - self.rect.width
+        self.rect.x = rng.randint(0, max_x)
+        self.last_shot = 0
+        self.shot_delay = rng.randint(1000, 3000)  # 1-3秒射击间隔
+        self.shot_event = None  # 安排好的下一次射击
+        self.base_shoot = base_shoot
+        self.can_shoot = rng.random() < self.base_shoot * speed_multiplier
+        self.speed_multiplier = speed_multiplier  # 保存速度倍数用于子弹
+      
+        self.sync_pos()
+        self.is_powerup = rng.random() < 0.1  # 10%概率是强化敌机
+        if self.is_powerup:
+            # 用颜色标记强化敌机（正式版可移除），变体图片全局共享
+            self.image = assets.variant("./enemy.png", *POWERUP_EFFECTS)
+
+    def next_shot_time(self, now):
+        """下一次可以射击的游戏时间"""
+        return max(now, self.last_shot + self.shot_delay)
+
+    def fire(self, now, bullets):
+        """往敌机子弹数组里发射一颗子弹，返回下一次射击的时间"""
+        self.last_shot = now
+        base_bullet_speed = 3  # 基础子弹速度
+        x = self.rect.centerx - bullets.width // 2
+        bullets.spawn(x, self.rect.bottom, 0, base_bullet_speed * self.speed_multiplier)
+        return now + self.shot_delay
+
+    def kill(self):
+        # 取消还没执行的射击，避免对象池复用后被旧的定时器触发
+        if self.shot_event is not None:
+            self.shot_event.cancel()
+            self.shot_event = None
+        super().kill()
+
+
+class Hero(GameSprite):
+    """英雄精灵"""
+
+    def __init__(self, bullets=None, bullet_pool=None):
+        super().__init__("./air.png")
+        self.rect.centerx = SCREEN_RECT.centerx
+        self.rect.bottom = SCREEN_RECT.bottom - 120
+        self.bullets = bullets if bullets is not None else pygame.sprite.Group()
+        # 子弹对象池由游戏持有，单独使用时自己建一个
+        self.bullet_pool = bullet_pool if bullet_pool is not None else SpritePool(Bullet, BULLET_POOL_SIZE)
+        self.last_shot = 0
+        self.shot_delay = 300
+        self.is_dead = False
+        self.combo_count = 0
+        self.last_hit_time = 0
+        self.combo_timeout = 1500 # 1.5秒内连续击中有加成
+        self.combo_multiplier = 1.0
+        self.power_level = 0
+        self.max_power = 3
+        self.power_time = 0
+        self.power_event = None  # 安排好的强化降级
+
+    def fire(self, now):
+        if now - self.last_shot > self.shot_delay:
+            self.last_shot = now
+           # 根据强化等级发射不同子弹
+            if self.power_level == 0:  # 默认单发
+                self.__fire_single()
+            elif self.power_level == 1:  # 双发
+                self.__fire_double()
+            else:  # 三发
+                self.__fire_triple()
+
+    def __fire_single(self):
+        bullet = self.bullet_pool.acquire()
+        bullet.rect.midbottom = self.rect.midtop
+        self.bullets.add(bullet)
+
+    def __fire_double(self):
+        for offset in [-15, 15]:
+            bullet = self.bullet_pool.acquire()
+            bullet.rect.bottom = self.rect.y
+            bullet.rect.centerx = self.rect.centerx + offset
+            self.bullets.add(bullet)
+
+    def __fire_triple(self):
+        self.__fire_double()
+        self.__fire_single()
+
+    def die(self):
+        self.is_dead = True
+
+    def add_combo(self, now):
+        if now - self.last_hit_time < self.combo_timeout:
+            self.combo_count += 1
+        else:
+            self.combo_count = 1  # 重置连击
+
+        self.last_hit_time = now
+       
+        # 连击加成公式：每5连击增加0.5倍 (1.0 -> 1.5 -> 2.0...)
+        self.combo_multiplier = 1.0 + (self.combo_count // 5) * 0.5
+        return int(10 * self.combo_multiplier)  # 基础分10分乘以倍率
+
+
+class Bullet(GameSprite):
+    """子弹精灵"""
+
+    def __init__(self):
+        super().__init__("./zidan.png", -2)
+
+    def reset(self):
+        """重置子弹状态（对象池复用时调用）"""
+        self.rect = self.image.get_rect()
+        self.speed = -2
+        self.sync_pos()
+
+    def update(self, dt=1.0):
+        super().update(dt)
+        if self.rect.bottom < 0:
+            self.kill()
+
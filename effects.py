@@ -0,0 +1,100 @@
+import pygame
+
+
+class Effect(object):
+    """图片特效基类
+
+    特效只由参数决定（参数相同的特效相等），所以可以作为缓存键：
+    同一张图片加同一串特效只生成一次，所有精灵共享结果。
+    """
+
+    def __init__(self, *args):
+        self.args = args
+
+    def apply(self, image):
+        """返回加了特效的新Surface，不修改image"""
+        raise NotImplementedError
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.args == other.args
+
+    def __hash__(self):
+        return hash((type(self).__name__,) + self.args)
+
+    def __repr__(self):
+        return f"{type(self).__name__}{self.args}"
+
+
+def silhouette(image, color):
+    """不透明部分填成color的剪影"""
+    return pygame.mask.from_surface(image).to_surface(setcolor=color, unsetcolor=(0, 0, 0, 0))
+
+
+class Tint(Effect):
+    """按颜色染色，透明度不变"""
+
+    def __init__(self, color):
+        super().__init__(tuple(color))
+
+    def apply(self, image):
+        tinted = image.copy()
+        tinted.fill(self.args[0] + (255,), special_flags=pygame.BLEND_RGBA_MULT)
+        return tinted
+
+
+class Backdrop(Effect):
+    """在图片后面铺一层纯色底（强化敌机的绿色标记）"""
+
+    def __init__(self, color):
+        super().__init__(tuple(color))
+
+    def apply(self, image):
+        result = pygame.Surface(image.get_size())
+        result.fill(self.args[0])
+        result.blit(image, (0, 0))
+        return result
+
+
+class Flash(Effect):
+    """整个剪影填成一种颜色（受击闪白）"""
+
+    def __init__(self, color=(255, 255, 255)):
+        super().__init__(tuple(color))
+
+    def apply(self, image):
+        return silhouette(image, self.args[0])
+
+
+class Outline(Effect):
+    """给不透明部分描边，图片尺寸不变"""
+
+    def __init__(self, color, width=1):
+        super().__init__(tuple(color), width)
+
+    def apply(self, image):
+        color, width = self.args
+        shape = silhouette(image, color)
+        result = pygame.Surface(image.get_size(), pygame.SRCALPHA)
+        for dx in range(-width, width + 1):
+            for dy in range(-width, width + 1):
+                if dx or dy:
+                    result.blit(shape, (dx, dy))
+        result.blit(image, (0, 0))
+        return result
+
+
+class Glow(Effect):
+    """在图片周围加一圈模糊的光晕，图片尺寸不变"""
+
+    def __init__(self, color, radius=4):
+        super().__init__(tuple(color), radius)
+
+    def apply(self, image):
+        color, radius = self.args
+        width, height = image.get_size()
+        shape = silhouette(image, color)
+        # 缩小再放大得到近似的模糊
+        small = pygame.transform.smoothscale(shape, (max(1, width // radius), max(1, height // radius)))
+        result = pygame.transform.smoothscale(small, (width, height))
+        result.blit(image, (0, 0))
+        return result
@@ -0,0 +1,144 @@
+import pygame
+
+from profiler import NULL_PROFILER
+
+# 实体标签
+BACKGROUND = "background"
+ENEMY = "enemy"
+POWERUP = "powerup"
+HERO = "hero"
+HERO_BULLET = "hero_bullet"
+ENEMY_BULLET = "enemy_bullet"
+
+# 绘制顺序（同时也是可以作为主标签的标签）
+DRAW_ORDER = (BACKGROUND, ENEMY, HERO, HERO_BULLET, ENEMY_BULLET)
+
+
+def blit_sprites(surface, sprites, alpha=1.0, collect=False):
+    """用一次Surface.blits画出一组精灵，返回画过的矩形（collect为True时）
+
+    同一张图片的精灵排在一起提交：按图片第一次出现的顺序分组，组内保持原来的顺序。
+    alpha为1时直接用rect，不再逐个计算插值位置。
+    """
+    if alpha >= 1.0:
+        sequence = [(sprite.image, sprite.rect) for sprite in sprites]
+    else:
+        sequence = [(sprite.image, sprite.draw_pos(alpha)) for sprite in sprites]
+    textures = dict.fromkeys([image for image, _ in sequence])
+    if len(textures) > 1:
+        order = {image: i for i, image in enumerate(textures)}
+        sequence.sort(key=lambda item: order[item[0]])
+    if collect:
+        return surface.blits(sequence)
+    surface.blits(sequence, doreturn=False)
+    return []
+
+
+class TagIndex(pygame.sprite.Group):
+    """某个标签下的实体索引，加入索引的精灵会自动登记到注册表"""
+
+    def __init__(self, registry, tag):
+        super().__init__()
+        self.registry = registry
+        self.tag = tag
+
+    def add_internal(self, sprite, layer=None):
+        super().add_internal(sprite)
+        self.registry.attach(sprite, self.tag)
+
+
+class EntityRegistry(object):
+    """实体注册表
+
+    每个实体只登记一次：update和draw对每个实体只执行一次，
+    按标签查询走预先建好的索引（TagIndex），不用遍历全部实体。
+    批量实体（如BulletArray）整体以一个标签登记。
+    """
+
+    def __init__(self, draw_order=DRAW_ORDER):
+        self.draw_order = draw_order
+        self.all = pygame.sprite.Group()
+        self.__layers = {tag: pygame.sprite.Group() for tag in draw_order}
+        self.__indexes = {}
+        self.__batches = {}
+        # 性能统计用的阶段名，提前拼好
+        self.__update_phases = {tag: "update:" + tag for tag in draw_order}
+        self.__draw_phases = {tag: "draw:" + tag for tag in draw_order}
+
+    def index(self, tag):
+        """返回标签的索引组"""
+        index = self.__indexes.get(tag)
+        if index is None:
+            index = self.__indexes[tag] = TagIndex(self, tag)
+        return index
+
+    def attach(self, sprite, tag):
+        """把精灵登记进全部实体，主标签决定它画在哪一层"""
+        self.all.add(sprite)
+        layer = self.__layers.get(tag)
+        if layer is not None and not any(sprite in group for group in self.__layers.values()):
+            layer.add(sprite)
+
+    def add(self, entity, tag, *extra_tags):
+        """登记实体，第一个标签为主标签"""
+        self.index(tag).add(entity)
+        for extra_tag in extra_tags:
+            self.index(extra_tag).add(entity)
+        return entity
+
+    def add_batch(self, tag, batch):
+        """登记批量实体（需要实现update/draw/len）"""
+        self.__batches[tag] = batch
+        return batch
+
+    def query(self, tag):
+        """标签下的所有实体"""
+        batch = self.__batches.get(tag)
+        if batch is not None:
+            return batch
+        return self.index(tag)
+
+    def count(self, tag):
+        return len(self.query(tag))
+
+    def counts(self):
+        """各标签下的实体数量"""
+        tags = list(self.__indexes) + list(self.__batches)
+        return {tag: self.count(tag) for tag in tags}
+
+    def update(self, dt=1.0, profiler=NULL_PROFILER):
+        """按层更新，每个实体更新一次，dt以标准帧为单位"""
+        for tag in self.draw_order:
+            with profiler.phase(self.__update_phases[tag]):
+                self.layer(tag).update(dt)
+
+    def layer(self, tag):
+        """某一层要画的实体"""
+        batch = self.__batches.get(tag)
+        if batch is not None:
+            return batch
+        return self.__layers[tag]
+
+    def draw(self, surface, alpha=1.0, skip=(), only=None, collect=False, profiler=NULL_PROFILER):
+        """按绘制顺序每个实体画一次
+
+        alpha为两次模拟之间的插值比例；collect为True时返回画过的矩形（脏矩形用）。
+        """
+        rects = []
+        for tag in self.draw_order:
+            if tag in skip or (only is not None and tag not in only):
+                continue
+            with profiler.phase(self.__draw_phases[tag]):
+                batch = self.__batches.get(tag)
+                if batch is not None:
+                    batch.draw(surface, alpha)
+                    if collect:
+                        rects.extend(batch.rects(alpha))
+                    continue
+                drawn = blit_sprites(surface, self.__layers[tag], alpha, collect)
+                if collect:
+                    rects.extend(drawn)
+        return rects
+
+    def __len__(self):
+        return len(self.all) + sum(len(batch) for batch in self.__batches.values())
@@ -0,0 +1,216 @@
+"""训练用的游戏环境（Gym风格的reset/step接口）
+
+    env = PlaneEnv(seed=0)
+    obs, info = env.reset()
+    obs, reward, terminated, truncated, info = env.step(action)
+观察是NumPy数组：固定长度的实体特征向量，或缩小后的画面。
+奖励取自游戏自身的得分（含连击加成），被击落时扣分。
+VectorPlaneEnv在一个进程内同步推进多局游戏，不绘制画面。
+"""
+import argparse
+import os
+import random
+import time
+
+import numpy as np
+import pygame
+
+from main import PlaneGame, SCREEN_RECT, FRAME_PER_SEC
+from sim import ACTIONS, ACTION_INPUTS
+
+# 实体特征：英雄一行，之后是最近的敌机和敌机子弹，不足的行补0
+HERO_FEATURES = 6  # x, y, 强化等级, 连击数, 连击倍率, 速度倍数
+ENEMY_FEATURES = 6  # 有效, x, y, 速度, 是否强化敌机, 是否会射击
+BULLET_FEATURES = 4  # 有效, x, y, 速度
+
+
+class PlaneEnv(object):
+    """单局游戏环境
+
+    obs_type为"entities"时观察是float32向量（坐标按屏幕尺寸归一化，相对英雄），
+    为"pixels"时是(高, 宽, 3)的uint8画面。每个动作重复frame_skip帧。
+    """
+
+    def __init__(self, seed=None, obs_type="entities", frame_skip=4, max_enemies=16, max_bullets=32,
+                 pixel_size=(84, 84), death_penalty=100.0, max_steps=None):
+        if obs_type not in ("entities", "pixels"):
+            raise ValueError(f"未知的观察类型: {obs_type}")
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        self.obs_type = obs_type
+        self.frame_skip = frame_skip
+        self.max_enemies = max_enemies
+        self.max_bullets = max_bullets
+        self.pixel_size = pixel_size
+        self.death_penalty = death_penalty
+        self.max_steps = max_steps
+        self.n_actions = len(ACTIONS)
+        if obs_type == "entities":
+            self.observation_shape = (HERO_FEATURES + max_enemies * ENEMY_FEATURES
+                                      + max_bullets * BULLET_FEATURES,)
+        else:
+            self.observation_shape = (pixel_size[1], pixel_size[0], 3)
+        self.__seeds = random.Random(seed)
+        self.__scale = np.array([SCREEN_RECT.width, SCREEN_RECT.height], dtype=np.float32)
+        self.game = None
+        self.steps = 0
+        self.__start_frame = 0  # 这一局开始时游戏的累计帧数
+
+    def reset(self, seed=None):
+        """开始新的一局，返回(观察, 信息)"""
+        if seed is None:
+            seed = self.__seeds.randrange(2 ** 32)
+        if self.game is None:
+            # 像素观察也不逐帧绘制，只在需要观察时画一次（见observe）
+            self.game = PlaneGame(headless=True, seed=seed)
+        else:
+            # 沿用同一个游戏，上一局的敌机和子弹回到对象池
+            self.game.restart(seed)
+        self.steps = 0
+        self.__start_frame = self.game.frame_count
+        return self.observe(), self.info()
+
+    def step(self, action):
+        """执行动作，返回(观察, 奖励, 是否结束, 是否截断, 信息)"""
+        game = self.game
+        frame_input = ACTION_INPUTS[action]
+        score = game.score
+        for _ in range(self.frame_skip):
+            game.step(1, frame_input)
+            if game.is_game_over or game.is_passed:
+                break
+        self.steps += 1
+        reward = float(game.score - score)
+        if game.is_game_over:
+            reward -= self.death_penalty
+        terminated = game.is_game_over or game.is_passed
+        truncated = not terminated and self.max_steps is not None and self.steps >= self.max_steps
+        return self.observe(), reward, terminated, truncated, self.info()
+
+    def info(self):
+        game = self.game
+        frames = game.frame_count - self.__start_frame
+        return {
+            "score": game.score,
+            "frames": frames,
+            "survival_time": frames / FRAME_PER_SEC,
+            "passed": game.is_passed,
+            "seed": game.seed,
+        }
+
+    def observe(self):
+        if self.obs_type == "pixels":
+            return self.__observe_pixels()
+        return self.__observe_entities()
+
+    def __observe_pixels(self):
+        # 跳过的frame_skip帧不画，每步只画返回观察的这一帧
+        self.game.draw()
+        small = pygame.transform.smoothscale(self.game.screen, self.pixel_size)
+        # surfarray是(宽, 高, 3)，转成(高, 宽, 3)
+        return pygame.surfarray.array3d(small).transpose(1, 0, 2)
+
+    def __observe_entities(self):
+        game = self.game
+        hero = game.hero
+        scale = self.__scale
+        hero_pos = np.array(hero.rect.center, dtype=np.float32)
+        obs = np.zeros(self.observation_shape, dtype=np.float32)
+        obs[0:2] = hero_pos / scale
+        obs[2] = hero.power_level / hero.max_power
+        obs[3] = min(hero.combo_count, 20) / 20.0
+        obs[4] = hero.combo_multiplier
+        obs[5] = game.speed_multiplier
+
+        offset = HERO_FEATURES
+        enemies = game.enemy_group.sprites()
+        if enemies:
+            rows = np.array([(1.0, enemy.rect.centerx, enemy.rect.centery, enemy.speed,
+                              enemy.is_powerup, enemy.can_shoot) for enemy in enemies], dtype=np.float32)
+            self.__fill_nearest(obs, offset, rows, hero_pos, self.max_enemies, ENEMY_FEATURES)
+            obs[offset + 3:offset + self.max_enemies * ENEMY_FEATURES:ENEMY_FEATURES] /= 10.0
+
+        offset += self.max_enemies * ENEMY_FEATURES
+        bullets = game.enemy_bullets
+        if bullets.count:
+            alive = bullets.alive[:bullets.count]
+            centers = bullets.pos[:bullets.count][alive] + (bullets.width / 2.0, bullets.height / 2.0)
+            rows = np.empty((len(centers), BULLET_FEATURES), dtype=np.float32)
+            rows[:, 0] = 1.0
+            rows[:, 1:3] = centers
+            rows[:, 3] = bullets.vel[:bullets.count][alive, 1] / 10.0
+            self.__fill_nearest(obs, offset, rows, hero_pos, self.max_bullets, BULLET_FEATURES)
+        return obs
+
+    def __fill_nearest(self, obs, offset, rows, hero_pos, limit, features):
+        """按离英雄的距离取最近的limit行，坐标换成相对英雄并归一化后写入obs"""
+        rows[:, 1:3] -= hero_pos
+        rows[:, 1:3] /= self.__scale
+        if len(rows) > limit:
+            distance = np.einsum("ij,ij->i", rows[:, 1:3], rows[:, 1:3])
+            rows = rows[np.argpartition(distance, limit)[:limit]]
+        obs[offset:offset + len(rows) * features] = rows.ravel()
+
+
+class VectorPlaneEnv(object):
+    """同步推进多局游戏的向量化环境
+
+    step接收每局一个动作，返回堆叠好的观察/奖励/结束标志。
+    某局结束后自动开始新的一局，结束那一步的观察放在info["final_observation"]里。
+    """
+
+    def __init__(self, n_envs, seed=None, **kwargs):
+        seeds = random.Random(seed)
+        self.envs = [PlaneEnv(seed=seeds.randrange(2 ** 32), **kwargs) for _ in range(n_envs)]
+        self.n_envs = n_envs
+        self.n_actions = self.envs[0].n_actions
+        self.observation_shape = (n_envs,) + self.envs[0].observation_shape
+        dtype = np.float32 if self.envs[0].obs_type == "entities" else np.uint8
+        self.__obs = np.zeros(self.observation_shape, dtype=dtype)
+
+    def reset(self):
+        infos = []
+        for i, env in enumerate(self.envs):
+            self.__obs[i], info = env.reset()
+            infos.append(info)
+        return self.__obs.copy(), infos
+
+    def step(self, actions):
+        rewards = np.zeros(self.n_envs, dtype=np.float32)
+        terminated = np.zeros(self.n_envs, dtype=bool)
+        truncated = np.zeros(self.n_envs, dtype=bool)
+        infos = []
+        for i, env in enumerate(self.envs):
+            obs, rewards[i], terminated[i], truncated[i], info = env.step(int(actions[i]))
+            if terminated[i] or truncated[i]:
+                info["final_observation"] = obs
+                obs, _ = env.reset()
+            self.__obs[i] = obs
+            infos.append(info)
+        return self.__obs.copy(), rewards, terminated, truncated, infos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="测量环境吞吐量（随机动作）")
+    parser.add_argument("--envs", type=int, default=16)
+    parser.add_argument("--steps", type=int, default=1000, help="每个环境的步数")
+    parser.add_argument("--obs", choices=("entities", "pixels"), default="entities")
+    parser.add_argument("--frame-skip", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    vec = VectorPlaneEnv(args.envs, seed=args.seed, obs_type=args.obs, frame_skip=args.frame_skip)
+    rng = np.random.default_rng(args.seed)
+    vec.reset()
+    episodes = 0
+    start = time.perf_counter()
+    for _ in range(args.steps):
+        _, _, terminated, truncated, _ = vec.step(rng.integers(vec.n_actions, size=vec.n_envs))
+        episodes += int(np.count_nonzero(terminated | truncated))
+    elapsed = time.perf_counter() - start
+    total = args.steps * args.envs
+    print(f"{total} 步，{episodes} 局结束，用时 {elapsed:.1f}s，"
+          f"{total / elapsed:.0f} 步/秒（{total * args.frame_skip / elapsed:.0f} 帧/秒）")
+
+
+if __name__ == '__main__':
+    main()
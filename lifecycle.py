@@ -0,0 +1,87 @@
+class BoundsPolicy(object):
+    """一类实体的生存范围
+
+    margin: 离开屏幕外扩margin像素的范围后回收（新敌机在屏幕上方出生，margin要留出它的高度）
+    max_lifetime: 最长存活时间（游戏时钟毫秒），None表示不限
+    cap: 同时存在的上限，超出时回收最早出生的，None表示不限
+    """
+
+    def __init__(self, margin=64, max_lifetime=None, cap=None):
+        self.margin = margin
+        self.max_lifetime = max_lifetime
+        self.cap = cap
+
+
+class LifecycleManager(object):
+    """按类型的生存范围回收实体
+
+    track()登记新出生的实体；update()每帧检查一次，把出界、超时的实体kill()
+    （敌机会取消射击并回到对象池）。被别处kill()的实体在下一次update时直接移除，
+    不算作回收。计数器跨局累计，用来确认长时间运行时实体数量不增长。
+    """
+
+    def __init__(self, bounds, policies=None):
+        self.bounds = bounds
+        self.policies = {}
+        self.__areas = {}
+        self.__born = {}  # 标签 -> {实体: 出生时间}，按出生先后排列
+        self.spawned = {}  # 标签 -> 累计登记数
+        self.despawned = {}  # 标签 -> 累计回收数
+        for tag, policy in (policies or {}).items():
+            self.set_policy(tag, policy)
+
+    def set_policy(self, tag, policy):
+        self.policies[tag] = policy
+        self.__areas[tag] = self.bounds.inflate(policy.margin * 2, policy.margin * 2)
+        self.__born.setdefault(tag, {})
+        self.spawned.setdefault(tag, 0)
+        self.despawned.setdefault(tag, 0)
+
+    def track(self, entity, tag, now):
+        """登记新出生的实体，超出上限时回收最早的"""
+        born = self.__born[tag]
+        # 对象池复用的实体按新出生处理，排到最后
+        born.pop(entity, None)
+        born[entity] = now
+        self.spawned[tag] += 1
+        cap = self.policies[tag].cap
+        if cap is not None:
+            while len(born) > cap:
+                oldest = next(iter(born))
+                self.__despawn(born, oldest, tag)
+        return entity
+
+    def __despawn(self, born, entity, tag):
+        del born[entity]
+        if entity.alive():
+            entity.kill()
+            self.despawned[tag] += 1
+
+    def update(self, now):
+        """回收出界和超时的实体，返回这次回收的个数"""
+        count = 0
+        for tag, born in self.__born.items():
+            if not born:
+                continue
+            area = self.__areas[tag]
+            max_lifetime = self.policies[tag].max_lifetime
+            expired = None if max_lifetime is None else now - max_lifetime
+            for entity, birth in list(born.items()):
+                if not entity.alive():
+                    del born[entity]
+                elif not area.colliderect(entity.rect) or (expired is not None and birth <= expired):
+                    self.__despawn(born, entity, tag)
+                    count += 1
+        return count
+
+    def live(self, tag):
+        return len(self.__born[tag])
+
+    def clear(self):
+        """不计数地放弃所有登记（重新开始时实体由调用方统一回收）"""
+        for born in self.__born.values():
+            born.clear()
+
+    def stats(self):
+        return {tag: {"live": len(born), "spawned": self.spawned[tag], "despawned": self.despawned[tag]}
+                for tag, born in self.__born.items()}
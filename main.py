@@ -1,286 +1,355 @@
+import argparse
+import os
 import sys
 import time
 
 import pygame
 import random
 
+import replay
+from assets import assets
+from core import (SCREEN_RECT, FRAME_PER_SEC, RED, WHITE, BLACK, FONT_LARGE, FONT_SMALL, get_font,
+                  BULLET_POOL_SIZE, ENEMY_POOL_SIZE, Bullet, Enemy, Hero)
+from background import ScrollingBackground, ScrollingLayer
+from bullets import BulletArray
+from entities import EntityRegistry, BACKGROUND, ENEMY, POWERUP, HERO, HERO_BULLET, ENEMY_BULLET
+from collision import Broadphase, RECT, MASK, collider, swept_rect
+from render import DirtyTracker
+from text import TextRenderer
+from profiler import FrameProfiler
+from lifecycle import LifecycleManager, BoundsPolicy
+from pool import SpritePool
+from scheduler import Scheduler
+from sim import GameClock, LiveInput, FrameInput, NO_INPUT, RESUME_INPUT
+
 
-# 游戏屏幕的尺寸
-SCREEN_RECT = pygame.Rect(0, 0, 433, 650)
-# 游戏的刷新帧率
-FRAME_PER_SEC = 60
-# 敌机的定时器常量
-CREATE_ENEMY_EVENT = pygame.USEREVENT
 # 英雄发射子弹事件
 Hero_FIRE_EVENT = pygame.USEREVENT + 1
-ENEMY_FIRE_EVENT = pygame.USEREVENT + 2
-
-pygame.font.init()
-font = pygame.font.Font(None, 60)
-font2 = pygame.font.Font(None, 20)
-RED = (255, 0, 0)
-WHITE = (255, 255, 255)
-BLACK = (0, 0, 0)
-pygame.display.set_caption("飞机游戏(请使用英文键盘)")
-
-
-class GameSprite(pygame.sprite.Sprite):
-    """游戏精灵基类"""
-
-    def __init__(self, image_name, speed=1):
-        super().__init__()
-        self.image = pygame.image.load(image_name)
-        self.rect = self.image.get_rect()
-        self.speed = speed
-
-    def update(self, *args):
-        self.rect.y += self.speed
-
-
-class Background(GameSprite):
-    """游戏背景精灵"""
-
-    def __init__(self, is_alt=False):
-        image_name = "./background.jpg"
-        super().__init__(image_name)
-        if is_alt:
-            self.rect.y = -self.rect.height
-
-    def update(self, *args):
-        super().update()
-        if self.rect.y >= SCREEN_RECT.height:
-            self.rect.y = -self.rect.height
-
-
-class Enemy(GameSprite):
-    """敌机精灵"""
-    def __init__(self, speed_multiplier=1.0):
-        super().__init__("./enemy.png")
-        self.base_speed = 2
-        self.speed = self.base_speed * speed_multiplier
-        self.rect.bottom = 0
-        max_x = SCREEN_RECT.width - self.rect.width
-        self.rect.x = random.randint(0, max_x)
-        self.bullets = pygame.sprite.Group()
-        self.last_shot = 0
-        self.shot_delay = random.randint(1000, 3000)  # 1-3秒射击间隔
-        self.base_shoot = 0.3
-        self.can_shoot = random.random() < self.base_shoot * speed_multiplier
-        self.speed_multiplier = speed_multiplier  # 保存速度倍数用于子弹
-      
-        self.is_powerup = random.random() < 0.1  # 10%概率是强化敌机
-        if self.is_powerup:
-            # 用颜色标记强化敌机（正式版可移除）
-            colored = pygame.Surface((self.rect.width, self.rect.height))
-            colored.fill((0, 255, 0))  # 绿色标记
-            colored.blit(self.image, (0, 0))
-            self.image = colored
-
-    def fire(self):
-        if not self.can_shoot:
-            return None
-
-        now = pygame.time.get_ticks()
-        if now - self.last_shot > self.shot_delay:
-            self.last_shot = now
-            bullet = EnemyBullet(self.speed_multiplier)  # 传入速度倍数
-            bullet.rect.centerx = self.rect.centerx
-            bullet.rect.top = self.rect.bottom
-            return bullet
-        return None
-
-class EnemyBullet(GameSprite):
-    """敌机子弹精灵"""
-    def __init__(self, speed_multiplier=1.0):
-        base_bullet_speed = 3  # 基础子弹速度
-        super().__init__("./zidan.png", base_bullet_speed * speed_multiplier)
-        self.speed_multiplier = speed_multiplier  # 保存速度倍数
-
-    def update(self, *args):
-        self.rect.y += self.speed  # 子弹向下飞行
-        if self.rect.top > SCREEN_RECT.height:
-            self.kill()
-class Hero(GameSprite):
-    """英雄精灵"""
-
-    def __init__(self):
-        super().__init__("./air.png")
-        self.rect.centerx = SCREEN_RECT.centerx
-        self.rect.bottom = SCREEN_RECT.bottom - 120
-        self.bullets = pygame.sprite.Group()
-        self.last_shot = 0
-        self.shot_delay = 300
-        self.is_dead = False
-        self.combo_count = 0
-        self.last_hit_time = 0
-        self.combo_timeout = 1500 # 1.5秒内连续击中有加成
-        self.combo_multiplier = 1.0
-        self.power_level = 0
-        self.max_power = 3
-        self.power_time = 0
-
-    def fire(self):
-        now = pygame.time.get_ticks()
-        if now - self.last_shot > self.shot_delay:
-            self.last_shot = now
-           # 根据强化等级发射不同子弹
-            if self.power_level == 0:  # 默认单发
-                self.__fire_single()
-            elif self.power_level == 1:  # 双发
-                self.__fire_double()
-            else:  # 三发
-                self.__fire_triple()
-          
-            
-            # 强化倒计时
-            if self.power_level > 0 and now - self.power_time > 1000:  # 1秒倒计时
-                self.power_level -= 1
-                print("Power level decreased to:", self.power_level)
-                self.power_time = now
-
-    def __fire_single(self):
-        bullet = Bullet()
-        bullet.rect.midbottom = self.rect.midtop
-        self.bullets.add(bullet)
-
-    def __fire_double(self):
-        for offset in [-15, 15]:
-            bullet = Bullet()
-            bullet.rect.bottom = self.rect.y
-            bullet.rect.centerx = self.rect.centerx + offset
-            self.bullets.add(bullet)
-
-    def __fire_triple(self):
-        self.__fire_double()
-        self.__fire_single()
-
-    def die(self):
-        self.is_dead = True
-
-    def add_combo(self):
-        now = pygame.time.get_ticks()
-        if now - self.last_hit_time < self.combo_timeout:
-            self.combo_count += 1
-        else:
-            self.combo_count = 1  # 重置连击
-
-        self.last_hit_time = now
-       
-        # 连击加成公式：每5连击增加0.5倍 (1.0 -> 1.5 -> 2.0...)
-        self.combo_multiplier = 1.0 + (self.combo_count // 5) * 0.5
-        return int(10 * self.combo_multiplier)  # 基础分10分乘以倍率
-
-
-class Bullet(GameSprite):
-    """子弹精灵"""
-
-    def __init__(self):
-        super().__init__("./zidan.png", -2)
-
-    def update(self, *args):
-        super().update()
-        if self.rect.bottom < 0:
-            self.kill()
+# 强化效果每级持续时间（毫秒）
+POWER_DECAY_MS = 1000
+# 渲染掉帧时一次最多追赶的模拟步数
+MAX_CATCH_UP = 5
+# 左上角信息栏所占区域（脏矩形模式每帧重画）
+HUD_RECT = pygame.Rect(0, 0, 240, 80)
+# 结束界面等静止画面下，没有事件时最长阻塞多久（毫秒）
+STATIC_WAIT_MS = 500
+# 英雄在这个范围（像素）内移动时，远处的敌机子弹按最早到达时间休眠，不逐帧检测
+BULLET_SLEEP_MARGIN = 32
+# 敌机的生存范围：离开屏幕64像素外、存活超过30秒或同时超过64架（对象池大小）时回收
+ENEMY_POLICY = BoundsPolicy(margin=64, max_lifetime=30000, cap=64)
+CAPTION = "飞机游戏(请使用英文键盘)"
 
 
 class PlaneGame(object):
     """飞机大战主游戏"""
 
-    def __init__(self):
-        print("游戏初始化..")
-        pygame.init()
+    def __init__(self, headless=False, seed=None, recorder=None, dirty_rects=False, hud_glyphs=False):
+        if not headless:
+            print("游戏初始化..")
+        self.headless = headless  # 无头模式：不开窗口、不限帧率，由step推进
+        self.render = not headless  # 是否绘制画面
+        # 脏矩形模式：每帧只提交变化的区域（低配机器使用），背景滚动了的帧整屏更新
+        self.dirty = DirtyTracker(SCREEN_RECT) if dirty_rects else None
+        self.__backdrop = None  # 脏矩形模式下背景停止滚动时缓存的背景，擦除时从这里取
+        self.__backdrop_offsets = None  # 最近一次画背景时的滚动偏移
+        self.__backdrop_ready = False  # 缓存是否已按这个偏移画好
+        # 文字渲染缓存，hud_glyphs开启时数字用预渲染字形拼接
+        self.text = TextRenderer(use_glyphs=hud_glyphs)
+        # 分阶段性能统计，默认关闭；按F3显示
+        self.profiler = FrameProfiler()
+        self.profile_path = None  # 退出时把统计导出到这个文件
+        if headless:
+            # 使用SDL的dummy驱动，不需要真实的显示设备
+            os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        # 只初始化用到的显示模块（pygame.init()还会初始化声音、手柄等，拖慢启动）
+        pygame.display.init()
         self.screen = pygame.display.set_mode(SCREEN_RECT.size)
+        pygame.display.set_caption(CAPTION)
+        assets.convert_all()
         self.clock = pygame.time.Clock()
+        # 逻辑时钟：每帧固定推进，暂停时不走，保证同一种子+输入可以重现
+        self.game_clock = GameClock()
+        # 每局游戏独立的随机数生成器
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        self.rng = random.Random(self.seed)
+        self.recorder = recorder  # 输入录制器（InputRecorder）
+        # 子弹与敌机碰撞的粗检测，按整步的移动范围登记，快速移动时也不会漏掉
+        self.broadphase = Broadphase(area=swept_rect)
+        # 每类实体的碰撞检测方式：MASK按不透明像素（掩码按图片缓存），RECT只比较矩形
+        self.collide_modes = {HERO: MASK, ENEMY: MASK, HERO_BULLET: RECT, ENEMY_BULLET: RECT}
+        # 刷怪、难度、敌机射击和强化降级都安排在逻辑时钟上
+        self.scheduler = Scheduler()
+        # 出界和超时实体的回收，计数跨局累计
+        self.lifecycle = LifecycleManager(SCREEN_RECT, {ENEMY: ENEMY_POLICY})
+        # 子弹和敌机的对象池，每局游戏各自持有，重新开始时沿用
+        self.bullet_pool = SpritePool(Bullet, BULLET_POOL_SIZE)
+        self.enemy_pool = SpritePool(Enemy, ENEMY_POOL_SIZE)
         self.__create_sprites()
-        pygame.time.set_timer(CREATE_ENEMY_EVENT, 800)
-        pygame.time.set_timer(ENEMY_FIRE_EVENT, 500)  # 敌机射击事件
         pygame.mouse.set_visible(False)
         self.is_game_over = False
-        self.game_start_time = time.time()
+        self.is_quit = False
+        self.frame_count = 0
+        self.game_start_time = self.game_clock.time()
         self.speed_multiplier = 1.0  # 初始速度倍数
         self.base_shoot =0.4
         self.difficulty_increase_interval = 10  # 每10秒增加难度
-        self.last_difficulty_increase = self.game_start_time
+        self.difficulty_step = 0.2  # 每次增加的速度倍数
+        self.enemy_base_shoot = 0.3  # 敌机基础射击概率（乘以速度倍数）
+        self.spawn_interval = 800  # 刷怪间隔（毫秒）
+        self.reset_timers()
         self.score = 0
+        self.win_score = 1000  # 通关分数
+        self.god_mode = False  # 无敌（压力测试用）
         self.using_keyboard = False  # 添加控制方式状态标记
-        self.pause_text = font.render("PAUSED", True, (255, 255, 0))
-        self.pause_rect = self.pause_text.get_rect(center=SCREEN_RECT.center)
+        # 暂停和结束界面共用的半透明遮罩，只创建一次
+        self.dim_overlay = pygame.Surface(SCREEN_RECT.size, pygame.SRCALPHA).convert_alpha()
+        self.dim_overlay.fill((0, 0, 0, 128))
+        self.__end_screen = None  # 结束界面缓存 (画面种类, 得分, Surface)
         self.is_paused = False
-        self.pause_start_time = 0
-        self.total_paused_time = 0
         self.last_elapsed_time = 0  # 新增：记录暂停前的时间
         self.is_passed = False  # 新增通关标志
+        self.frame_mode = "play"  # 最近一次模拟后该画哪种画面
+        self.render_fps = FRAME_PER_SEC  # 渲染帧率，低配机器可以降到30，模拟仍按60步进
 
     def __handle_pause(self):
-        """优化的暂停逻辑"""
+        """暂停：阻塞等待事件，只在显示的暂停秒数变化时重画计时文字"""
+        # 暂停时逻辑时钟不走，这里只用真实时间显示暂停时长
         pause_start = time.time()
+        # 遮罩和PAUSED文字只合成一次，之后用它擦除计时文字
+        paused_frame = self.screen.copy()
+        paused_frame.blit(self.dim_overlay, (0, 0))
+        pause_text = self.text.render(get_font(FONT_LARGE), "PAUSED", (255, 255, 0))
+        pause_rect = pause_text.get_rect(center=SCREEN_RECT.center)
+        paused_frame.blit(pause_text, pause_rect)
+        self.screen.blit(paused_frame, (0, 0))
+        pygame.display.update()
+        text_pos = (pause_rect.x, pause_rect.y + 50)
+        shown = None
+        text_rect = None
         while self.is_paused:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    self.__game_over()
-                    return 0  # 退出时返回0，防止None类型参与运算
-                elif event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_ESCAPE:
-                        self.is_paused = False
-                        return time.time() - pause_start
-            overlay = pygame.Surface(SCREEN_RECT.size, pygame.SRCALPHA)
-            overlay.fill((0, 0, 0, 128))
-            self.screen.blit(overlay, (0, 0))
-            self.screen.blit(self.pause_text, self.pause_rect)
-            paused_time = time.time() - pause_start
-            time_text = font2.render(f"Paused: {paused_time:.1f}s", True, (255, 255, 255))
-            self.screen.blit(time_text, (self.pause_rect.x, self.pause_rect.y + 50))
-            pygame.display.flip()
-            self.clock.tick(10)
-        return 0
+            paused_time = int(time.time() - pause_start)
+            if paused_time != shown:
+                shown = paused_time
+                dirty = [] if text_rect is None else [text_rect]
+                if text_rect is not None:
+                    self.screen.blit(paused_frame, text_rect, text_rect)
+                text_rect = self.text.draw(self.screen, get_font(FONT_SMALL), f"Paused: {paused_time}s",
+                                           WHITE, text_pos)
+                pygame.display.update(dirty + [text_rect])
+            # 阻塞到有事件或下一秒，不再空转
+            timeout = int((pause_start + paused_time + 1 - time.time()) * 1000) + 1
+            event = pygame.event.wait(max(1, timeout))
+            if event.type == pygame.QUIT:
+                self.__game_over()
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+                self.is_paused = False
+                if self.recorder is not None:
+                    self.recorder.record(RESUME_INPUT)
+        # 暂停的时间不计入下一帧
+        self.clock.tick()
+        if self.dirty is not None:
+            self.dirty.invalidate()
 
     def __create_sprites(self):
         """创建精灵和精灵组"""
-        bg1 = Background()
-        bg2 = Background(True)
-        bg2.rect.y = -bg2.rect.height
-        self.back_group = pygame.sprite.Group(bg1, bg2)
-        self.enemy_group = pygame.sprite.Group()
-        self.powerup_group = pygame.sprite.Group()
-        self.enemy_bullets = pygame.sprite.Group()  # 所有敌机子弹
-        self.hero = Hero()
-        self.hero_group = pygame.sprite.Group(self.hero)
-
-    def start_game(self):
+        # 所有实体登记在注册表里，下面的组都是按标签建立的索引
+        self.entities = EntityRegistry()
+        # 背景每帧向下滚动1像素
+        self.background = self.entities.add_batch(BACKGROUND, ScrollingBackground(
+            [ScrollingLayer(assets.load("./background.jpg"), SCREEN_RECT.size, 1)]))
+        self.enemy_group = self.entities.index(ENEMY)
+        self.powerup_group = self.entities.index(POWERUP)  # 强化敌机（同时也在enemy_group里）
+        self.enemy_bullets = self.entities.add_batch(
+            ENEMY_BULLET, BulletArray(assets.load("./zidan.png"), SCREEN_RECT))  # 所有敌机子弹
+        self.hero = self.entities.add(Hero(self.entities.index(HERO_BULLET), self.bullet_pool), HERO)
+        self.hero_group = self.entities.index(HERO)
+
+    def start_game(self, replay=None):
+        """游戏主循环，传入replay时按录像中的输入回放，播完后交还给玩家"""
         print("游戏开始...")
-        self.game_start_time = time.time()
-        self.total_paused_time = 0
-        self.pause_start_time = 0
-        # 游戏主循环
+        self.game_start_time = self.game_clock.time()
+        frame_ms = 1000.0 / FRAME_PER_SEC
+        replay_index = 0
+        accumulator = 0.0  # 尚未模拟的真实时间
+        pending_events = []  # 还没有被模拟步消费的事件
+        # 游戏主循环：模拟固定步长，渲染帧率可以低于模拟帧率
         while True:
-            self.clock.tick(FRAME_PER_SEC)
-            current_time = time.time()
-            # 计算实际游戏时间（总时间-暂停时间）
-            elapsed_time = current_time - self.game_start_time - self.total_paused_time
+            if replay is None or replay_index >= len(replay):
+                # 结束界面画面不变，阻塞等待按键而不是每秒空转60帧
+                self.__wait_while_static()
+            elapsed_ms = self.clock.tick(self.render_fps)
+            profiler = self.profiler
+            profiler.begin_frame()
+            if replay is not None and replay_index < len(replay):
+                if any(event.type == pygame.QUIT for event in pygame.event.get()):
+                    self.__game_over()
+                self.step(1, [replay[replay_index]])
+                replay_index += 1
+                self.__present()
+                profiler.end_frame()
+                continue
             # 暂停状态处理
             if self.is_paused:
-                paused_duration = self.__handle_pause()
-                self.total_paused_time += paused_duration
+                profiler.end_frame()
+                self.__handle_pause()
+                accumulator = 0.0
                 continue
-            if not self.is_game_over:
-                self.last_elapsed_time = elapsed_time  # 只在非暂停时更新
-                self.__update_game_state(elapsed_time, current_time)
-            
-        
+            # 卡顿太久时最多补MAX_CATCH_UP步，避免越追越慢
+            accumulator = min(accumulator + elapsed_ms, frame_ms * MAX_CATCH_UP)
+            with profiler.phase("events"):
+                pending_events.extend(pygame.event.get())
+                if accumulator >= frame_ms:
+                    frame_input = LiveInput(pending_events)
+            while accumulator >= frame_ms and not self.is_paused:
+                if self.recorder is not None:
+                    self.recorder.record(frame_input)
+                self.game_clock.advance(frame_ms)
+                self.__run_frame(pending_events, frame_input)
+                accumulator -= frame_ms
+                # 按键事件只交给第一步，后续步骤只保留按住的键
+                pending_events = []
+                frame_input.key_downs = ()
+                frame_input.quit = False
+                frame_input.mouse_moved = False
+            self.__draw_frame(accumulator / frame_ms)
+            self.__present()
+            profiler.end_frame(self.entities.counts() if profiler.enabled else None)
+
+    def __wait_while_static(self):
+        """画面静止时阻塞到有事件为止，事件放回队列交给主循环处理"""
+        while self.frame_mode in ("game_over", "pass_screen") and not self.profiler.overlay:
+            event = pygame.event.wait(STATIC_WAIT_MS)
+            if event.type != pygame.NOEVENT:
+                pygame.event.post(event)
+                return
+
+    def __present(self):
+        """把本帧画面提交到屏幕"""
+        with self.profiler.phase("present"):
+            if self.dirty is not None:
+                self.dirty.present()
+            else:
+                pygame.display.update()
 
-            # 处理所有事件
-            for event in pygame.event.get():
+    def step(self, n_frames=1, inputs=None):
+        """无头模式：在模拟时钟上推进n_frames帧，不限帧率
+
+        inputs可以是None、单个FrameInput（每帧相同）或逐帧的FrameInput序列。
+        返回实际推进的帧数（按Q或关闭时提前结束）。
+        """
+        frame_ms = 1000.0 / FRAME_PER_SEC
+        for i in range(n_frames):
+            if self.is_quit:
+                return i
+            if inputs is None:
+                frame_input = NO_INPUT
+            elif isinstance(inputs, FrameInput):
+                frame_input = inputs
+            else:
+                frame_input = inputs[i]
+            if self.recorder is not None:
+                self.recorder.record(frame_input)
+            if self.is_paused:
+                # 暂停期间只响应ESC，游戏时间不前进
+                if pygame.K_ESCAPE in frame_input.key_downs:
+                    self.is_paused = False
+                continue
+            self.game_clock.advance(frame_ms)
+            profiler = self.profiler
+            profiler.begin_frame()
+            self.__run_frame(frame_input.events(), frame_input)
+            if self.render:
+                self.__draw_frame()
+            profiler.end_frame(self.entities.counts() if profiler.enabled else None)
+        return n_frames
+
+    def reset_timers(self):
+        """清空定时器，按当前的刷怪间隔和难度间隔重新安排（修改这两个参数后调用）"""
+        now = self.game_clock.get_ticks()
+        self.scheduler.clear()
+        self.scheduler.every(now + self.spawn_interval, self.spawn_interval, self.__on_spawn)
+        interval = self.difficulty_increase_interval * 1000
+        self.scheduler.every(now + interval, interval, self.__on_difficulty)
+
+    def spawn_enemy(self):
+        """按当前难度生成一架敌机并登记"""
+        enemy = self.enemy_pool.acquire(self.speed_multiplier, self.rng, self.enemy_base_shoot)
+        if enemy.is_powerup:
+            self.entities.add(enemy, ENEMY, POWERUP)
+        else:
+            self.entities.add(enemy, ENEMY)
+        self.lifecycle.track(enemy, ENEMY, self.game_clock.get_ticks())
+        if enemy.can_shoot:
+            self.schedule_enemy_fire(enemy)
+        return enemy
+
+    def schedule_enemy_fire(self, enemy):
+        """按敌机的射击间隔安排它的下一次射击"""
+        if enemy.shot_event is not None:
+            enemy.shot_event.cancel()
+        due = enemy.next_shot_time(self.game_clock.get_ticks())
+        enemy.shot_event = self.scheduler.at(due, self.__on_enemy_fire, enemy)
+
+    def __on_spawn(self, now):
+        if not self.is_game_over and not self.is_passed:
+            self.spawn_enemy()
+
+    def __on_difficulty(self, now):
+        """定时增加难度"""
+        if self.is_game_over:
+            return
+        self.speed_multiplier += self.difficulty_step
+        if not self.headless:
+            print(f"难度增加! 速度倍数: {self.speed_multiplier}")
+
+    def __on_enemy_fire(self, now, enemy):
+        enemy.shot_event = None
+        if self.is_game_over or self.is_passed:
+            return
+        due = enemy.fire(now, self.enemy_bullets)
+        enemy.shot_event = self.scheduler.at(due, self.__on_enemy_fire, enemy)
+
+    def power_up(self, now):
+        """强化等级加一，每过POWER_DECAY_MS降一级"""
+        hero = self.hero
+        hero.power_level = min(hero.power_level + 1, hero.max_power)
+        hero.power_time = now
+        if hero.power_event is not None:
+            hero.power_event.cancel()
+        hero.power_event = self.scheduler.at(now + POWER_DECAY_MS, self.__on_power_decay)
+
+    def __on_power_decay(self, now):
+        hero = self.hero
+        hero.power_event = None
+        if hero.power_level > 0:
+            hero.power_level -= 1
+            hero.power_time = now
+        if hero.power_level > 0:
+            hero.power_event = self.scheduler.at(now + POWER_DECAY_MS, self.__on_power_decay)
+
+    def __run_frame(self, events, frame_input):
+        """运行一帧游戏逻辑（实时和无头模式共用）"""
+        self.frame_count += 1
+        profiler = self.profiler
+        current_time = self.game_clock.time()
+        # 计算实际游戏时间（逻辑时钟在暂停时不走）
+        elapsed_time = current_time - self.game_start_time
+        if not self.is_game_over:
+            self.last_elapsed_time = elapsed_time  # 只在非暂停时更新
+
+        # 执行到期的定时任务（刷怪、难度、敌机射击、强化降级）
+        now = self.game_clock.get_ticks()
+        with profiler.phase("timers"):
+            self.scheduler.run_due(now)
+
+        # 处理所有事件
+        with profiler.phase("events:game"):
+            for event in events:
                 if event.type == pygame.QUIT:
                     self.__game_over()
-                elif event.type == CREATE_ENEMY_EVENT and not self.is_game_over and not self.is_passed:
-                    enemy = Enemy(self.speed_multiplier)
-                    self.enemy_group.add(enemy)
-                    self.powerup_group.add(enemy)
-                elif event.type == ENEMY_FIRE_EVENT and not self.is_game_over and not self.is_passed:
-                    for enemy in self.enemy_group or self.powerup_group:
-                        bullet = enemy.fire()
-                        if bullet:
-                            self.enemy_bullets.add(bullet)
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:  # F3开关性能统计
+                    self.profiler.overlay = not self.profiler.overlay
+                    self.profiler.enabled = self.profiler.overlay or bool(self.profile_path)
                 elif event.type == pygame.KEYDOWN and (self.is_game_over or self.is_passed):  # 支持通关界面按键
                     if event.key == pygame.K_r:  # 按R重新开始
                         self.__restart_game()
@@ -289,68 +358,85 @@ class PlaneGame(object):
                 elif event.type == pygame.KEYDOWN and not self.is_game_over:
                     if event.key == pygame.K_ESCAPE:  # ESC暂停
                         self.is_paused = not self.is_paused
-                        # 确保输出立即刷新
-                        print("游戏已暂停" if self.is_paused else "游戏继续", flush=True)
-                        
-                        # 添加调试信息
-                        print(f"当前暂停状态: {self.is_paused}")
-                        print(f"游戏时间: {time.time() - self.game_start_time - self.total_paused_time:.2f}s")
+                        if not self.headless:
+                            # 确保输出立即刷新
+                            print("游戏已暂停" if self.is_paused else "游戏继续", flush=True)
+
+                            # 添加调试信息
+                            print(f"当前暂停状态: {self.is_paused}")
+                            print(f"游戏时间: {self.game_clock.time() - self.game_start_time:.2f}s")
                         if self.is_paused:
                             # 不要在这里调用self.__handle_pause()，主循环会自动处理
                             pass
-            if self.is_passed:
-                finished = self.__pass_update()
-                if finished:
-                    self.__pass_screen()
-                else:
-                    # 只绘制背景和hero动画，不显示通关文字
-                    self.back_group.update()
-                    self.back_group.draw(self.screen)
-                    self.hero_group.update()
-                    self.hero_group.draw(self.screen)
-                pygame.display.update()
-                continue
-            elif not self.is_game_over or not self.__handle_pause:
-                #击中检测
+        if self.is_quit:
+            return
+        if self.is_passed:
+            finished = self.__pass_update()
+            if finished:
+                self.frame_mode = "pass_screen"
+            else:
+                # 只有背景和hero动画，不显示通关文字
+                self.background.update()
+                self.hero_group.update()
+                self.frame_mode = "pass_anim"
+        elif not self.is_game_over or not self.__handle_pause:
+            #击中检测
+            with profiler.phase("collide"):
                 self.__check_collide()
-                # 更新精灵组
-                self.__update_sprites()
-                # 显示当前难度
+            # 更新精灵组
+            self.__update_sprites(frame_input)
+            self.frame_mode = "play"
+        else:
+            self.frame_mode = "game_over"
+
+    def __draw_frame(self, alpha=1.0):
+        """绘制当前状态，alpha为上一次到这一次模拟之间的插值比例"""
+        if self.dirty is not None and self.frame_mode != "play":
+            # 通关动画和结束界面整屏变化，不走脏矩形
+            self.dirty.invalidate()
+        if self.frame_mode == "pass_screen":
+            self.__pass_screen()
+        elif self.frame_mode == "pass_anim":
+            self.entities.draw(self.screen, alpha, only=(BACKGROUND, HERO))
+        elif self.frame_mode == "play":
+            with self.profiler.phase("draw:background"):
+                self.__draw_background(alpha)
+            rects = self.entities.draw(self.screen, alpha, skip=(BACKGROUND,), collect=self.dirty is not None,
+                                       profiler=self.profiler)
+            if self.dirty is not None:
+                self.dirty.add(rects)
+            # 显示当前难度
+            with self.profiler.phase("hud"):
                 self.__show_difficulty(self.last_elapsed_time)  # 始终传递last_elapsed_time
-            else:
-                self.__game_over_screen()
-
-            pygame.display.update()
+        elif self.frame_mode == "game_over":
+            self.__game_over_screen()
+        if self.profiler.overlay:
+            rects = self.profiler.draw_overlay(self.screen, self.text, get_font(FONT_SMALL), RED)
+            if self.dirty is not None:
+                self.dirty.add(rects)
 
 
-    def __update_game_state(self, elapsed_time, current_time):
-        """更新游戏状态"""
-        if current_time - self.last_difficulty_increase > self.difficulty_increase_interval and not self.is_game_over:
-            self.speed_multiplier += 0.2
-            self.last_difficulty_increase = current_time
-            print(f"难度增加! 速度倍数: {self.speed_multiplier}")
-        
     def __show_difficulty(self, elapsed_time):
         """显示当前游戏时间和难度"""
         # 防止暂停时计时继续
         if self.is_paused:
             elapsed_time = self.last_elapsed_time
-        time_text = font2.render(f"Time: {int(elapsed_time)}s", True, BLACK)
-        difficulty_text = font2.render(f"Speed: x{self.speed_multiplier:.1f}", True,BLACK)
-        self.screen.blit(time_text, (5, 5))
-        self.screen.blit(difficulty_text, (5, 20))
-        score_text = font2.render(f"Score: {self.score}", True, BLACK)
-        self.screen.blit(score_text, (5, 50))
-        can_shoot = font2.render(f"can_shoot: {self.base_shoot * self.speed_multiplier}", True, BLACK)
-        self.screen.blit(can_shoot, (5, 35))
-        combo_text = font2.render(
+        text = self.text
+        font = get_font(FONT_SMALL)
+        text.draw(self.screen, font, f"Time: {int(elapsed_time)}s", BLACK, (5, 5))
+        text.draw(self.screen, font, f"Speed: x{self.speed_multiplier:.1f}", BLACK, (5, 20))
+        text.draw(self.screen, font, f"Score: {self.score}", BLACK, (5, 50))
+        text.draw(self.screen, font, f"can_shoot: {self.base_shoot * self.speed_multiplier}", BLACK, (5, 35))
+        text.draw(
+            self.screen, font,
             f"Combo: {self.hero.combo_count}x ({self.hero.combo_multiplier:.1f}倍)",
-            True,
-            (255, 0, 0) if self.hero.combo_count >= 5 else BLACK  # 5连击以上变红色
+            (255, 0, 0) if self.hero.combo_count >= 5 else BLACK,  # 5连击以上变红色
+            (5, 60)
         )
-        self.screen.blit(combo_text, (5, 60))
+        if self.dirty is not None:
+            self.dirty.add([HUD_RECT])
         if self.hero.combo_count > 0:
-            now = pygame.time.get_ticks()
+            now = self.game_clock.get_ticks()
             remaining_time = max(0, self.hero.combo_timeout - (now - self.hero.last_hit_time))
             progress = remaining_time / self.hero.combo_timeout
             pygame.draw.rect(self.screen, (255, 0, 0), (5, 70, 100 * progress, 5))
@@ -361,14 +447,14 @@ class PlaneGame(object):
     
       
 
-    def __event_handle(self):
+    def __event_handle(self, frame_input):
         """事件监听"""
         if not self.is_game_over and not self.hero.is_dead:
             #飞机开火
-            self.hero.fire()
+            self.hero.fire(self.game_clock.get_ticks())
             
             # 键盘移动
-            keys = pygame.key.get_pressed()
+            keys = frame_input.keys
             move_speed = 5
             moved_by_keyboard = False
             
@@ -391,12 +477,12 @@ class PlaneGame(object):
             # 更新控制方式状态
             if moved_by_keyboard:
                 self.using_keyboard = True
-            elif pygame.mouse.get_rel() != (0, 0):  # 检测鼠标移动
+            elif frame_input.mouse_moved:  # 检测鼠标移动
                 self.using_keyboard = False
 
             # 鼠标移动
             if not self.using_keyboard:
-                mouse_x, mouse_y = pygame.mouse.get_pos()
+                mouse_x, mouse_y = frame_input.mouse_pos
                 if 0 <= mouse_x <= SCREEN_RECT.width and 0 <= mouse_y <= SCREEN_RECT.height:
                     self.hero.rect.centerx = mouse_x
                     self.hero.rect.centery = mouse_y
@@ -414,13 +500,31 @@ class PlaneGame(object):
        
             
          
+    def __hero_bullet_hits(self):
+        """击中英雄的敌机子弹下标（先按移动路径比较矩形，需要时再比较掩码）"""
+        hero, bullets = self.hero, self.enemy_bullets
+        hero_mode, bullet_mode = self.collide_modes[HERO], self.collide_modes[ENEMY_BULLET]
+        if hero_mode == RECT and bullet_mode == RECT:
+            return bullets.collide_swept(hero.rect, BULLET_SLEEP_MARGIN)
+        hero_mask = assets.mask(hero.image) if hero_mode == MASK else assets.rect_mask(hero.rect.size)
+        if bullet_mode == MASK:
+            bullet_mask = assets.mask(bullets.image)
+        else:
+            bullet_mask = assets.rect_mask((bullets.width, bullets.height))
+        return bullets.collide_mask(hero.rect, hero_mask, bullet_mask, BULLET_SLEEP_MARGIN)
+
     def __check_collide(self):
+        now = self.game_clock.get_ticks()
         # 1. 先检测玩家与敌机/子弹的碰撞（保存碰撞结果）
-        collided_enemies = pygame.sprite.spritecollide(self.hero, self.enemy_group, False)
-        collided_bullets = pygame.sprite.spritecollide(self.hero, self.enemy_bullets, True)
+        modes = self.collide_modes
+        # 敌机登记一次，英雄和英雄子弹的检测共用
+        self.broadphase.build(self.enemy_group)
+        collided_enemies = self.broadphase.collide(self.hero, collider(modes[HERO], modes[ENEMY]))
+        collided_bullets = self.__hero_bullet_hits()
+        self.enemy_bullets.kill(collided_bullets)
         
         # 玩家被击中则死亡
-        if (collided_enemies or collided_bullets) and not self.hero.is_dead:
+        if (collided_enemies or len(collided_bullets)) and not self.hero.is_dead and not self.god_mode:
             self.hero.die()
             self.is_game_over = True
             # 敌机被撞也消失
@@ -430,11 +534,13 @@ class PlaneGame(object):
         
         # 2. 玩家子弹击中敌机（仅当玩家存活时处理）
         if not self.hero.is_dead:
-            hits = pygame.sprite.groupcollide(
-                self.hero.bullets, 
-                self.enemy_group, 
+            hits = self.broadphase.groupcollide(
+                self.hero.bullets,
+                self.enemy_group,
                 True,   # 删除子弹
-                False   # 不自动删除敌机
+                False,  # 不自动删除敌机
+                collider(modes[HERO_BULLET], modes[ENEMY]),
+                rebuild=False
             )
             
             # 处理击中逻辑
@@ -447,112 +553,169 @@ class PlaneGame(object):
                     if dead:
                         self.score += 10
                         enemy.kill()
-                        self.score += self.hero.add_combo()
+                        self.score += self.hero.add_combo(now)
                         if hasattr(enemy, "is_powerup") and enemy.is_powerup:
-                            self.hero.power_level = min(self.hero.power_level+1, self.hero.max_power)
-                            self.hero.power_time = pygame.time.get_ticks()
+                            self.power_up(now)
         
         # 3. 通关判断
-        if self.score >= 1000:
+        if self.score >= self.win_score:
             self.is_passed = True
             
 
-    def __update_sprites(self):
+    def __update_sprites(self, frame_input):
         """更新精灵组"""
-        self.back_group.update()
-        self.back_group.draw(self.screen)
-        self.enemy_group.update()
-        self.enemy_group.draw(self.screen)
-        self.powerup_group.update()
-        self.powerup_group.draw(self.screen)
-        self.hero_group.update()
-        self.hero_group.draw(self.screen)
-        self.hero.bullets.update()
-        self.hero.bullets.draw(self.screen)
-        self.enemy_bullets.update()
-        self.enemy_bullets.draw(self.screen)
+        # 每个实体只更新一次
+        self.entities.update(profiler=self.profiler)
+        # 回收飞出屏幕的敌机，否则它们会一直被更新、绘制和检测碰撞
+        with self.profiler.phase("lifecycle"):
+            self.lifecycle.update(self.game_clock.get_ticks())
         # 更新英雄位置
-        self.__event_handle()
+        with self.profiler.phase("hero_input"):
+            self.__event_handle(frame_input)
+
+    def __draw_background(self, alpha=1.0):
+        """画背景；脏矩形模式下背景没有滚动时只用缓存的背景擦除上一帧画过的区域
+
+        渲染帧率不高于模拟帧率时背景每帧都在滚动，不会有局部更新的帧，直接整屏画。
+        """
+        if self.dirty is None:
+            self.entities.draw(self.screen, alpha, only=(BACKGROUND,))
+            return
+        offsets = self.background.offsets(alpha)
+        if self.render_fps <= FRAME_PER_SEC or self.dirty.is_full or offsets != self.__backdrop_offsets:
+            # 背景滚动了，直接画到屏幕上，这一帧整屏更新
+            self.entities.draw(self.screen, alpha, only=(BACKGROUND,))
+            self.__backdrop_offsets = offsets
+            self.__backdrop_ready = False
+            self.dirty.invalidate()
+            return
+        if not self.__backdrop_ready:
+            # 滚动停下后的第一帧才把背景画进缓存，同一偏移下之后的擦除都从这里取
+            if self.__backdrop is None:
+                self.__backdrop = pygame.Surface(SCREEN_RECT.size).convert()
+            self.background.draw(self.__backdrop, alpha)
+            self.__backdrop_ready = True
+        self.dirty.erase(self.screen, self.__backdrop)
 
     def __game_over_screen(self):
         """游戏结束界面"""
-        # 半透明背景
-        s = pygame.Surface((SCREEN_RECT.width, SCREEN_RECT.height), pygame.SRCALPHA)
-        s.fill((0, 0, 0, 128))
-        self.screen.blit(s, (0, 0))
-
-        # 游戏结束文字
-        game_over_text = font.render("Game Over!", True, RED)
-        game_over_rect = game_over_text.get_rect(center=(SCREEN_RECT.width // 2, SCREEN_RECT.height // 2 - 50))
-        self.screen.blit(game_over_text, game_over_rect)
-        #得分
-        score_text = font.render(f"Score: {self.score}", True,RED)
-        score_rect =score_text.get_rect(center=(SCREEN_RECT.width // 2, SCREEN_RECT.height // 2 ))
-        self.screen.blit(score_text, score_rect)
-        # 操作提示
-        restart_text = font.render("R == Restart_game!", True, WHITE)
-        restart_rect = restart_text.get_rect(center=(SCREEN_RECT.width // 2, SCREEN_RECT.height // 2 + 50))
-        self.screen.blit(restart_text, restart_rect)
-
-        quit_text = font.render("Q== Quit_game!", True, WHITE)
-        quit_rect = quit_text.get_rect(center=(SCREEN_RECT.width // 2, SCREEN_RECT.height // 2 + 120))
-        self.screen.blit(quit_text, quit_rect)
+        self.__end_screen_frame("game_over", "Game Over!", RED)
+
+    def __end_screen_frame(self, mode, title, color):
+        """结束界面：第一次显示时在当前画面上合成遮罩和文字并缓存，之后每帧直接贴缓存
+
+        以前每帧都在上一帧上再叠一层遮罩，画面会越来越暗。
+        """
+        if self.__end_screen is None or self.__end_screen[:2] != (mode, self.score):
+            frame = self.screen.copy()
+            font = get_font(FONT_LARGE)
+            # 半透明背景
+            frame.blit(self.dim_overlay, (0, 0))
+            center_x = SCREEN_RECT.width // 2
+            center_y = SCREEN_RECT.height // 2
+            self.text.draw(frame, font, title, color, center=(center_x, center_y - 50))
+            # 得分
+            self.text.draw(frame, font, f"Score: {self.score}", color, center=(center_x, center_y))
+            # 操作提示
+            self.text.draw(frame, font, "R == Restart_game!", WHITE, center=(center_x, center_y + 50))
+            self.text.draw(frame, font, "Q== Quit_game!", WHITE, center=(center_x, center_y + 120))
+            self.__end_screen = (mode, self.score, frame)
+        self.screen.blit(self.__end_screen[2], (0, 0))
 
     def __pass_update(self):
         """通关时hero慢慢飞出地图，飞出后返回True"""
         # 清空敌人和子弹
-        self.enemy_group.empty()
-        self.enemy_bullets.empty()
-        self.powerup_group.empty()
+        self.__recycle_sprites()
         # 只让hero向上飞出
         if self.hero.rect.bottom > 0:
             self.hero.rect.y -= 10 # 更慢的飞出速度
-            # 绘制背景和hero
-            self.back_group.update()
-            self.back_group.draw(self.screen)
+            # 移动背景和hero
+            self.background.update()
             self.hero_group.update()
-            self.hero_group.draw(self.screen)
             return False  # 尚未飞出
         else:
             return True   # 已飞出，显示通关界面
 
     def __pass_screen(self):
         """显示通关界面"""
-        s = pygame.Surface((SCREEN_RECT.width, SCREEN_RECT.height), pygame.SRCALPHA)
-        s.fill((0, 0, 0, 128))
-        self.screen.blit(s, (0, 0))
-        pass_text = font.render("YOU WIN!", True, (0, 255, 0))
-        pass_rect = pass_text.get_rect(center=(SCREEN_RECT.width // 2, SCREEN_RECT.height // 2 - 50))
-        self.screen.blit(pass_text, pass_rect)
-        score_text = font.render(f"Score: {self.score}", True, (0, 255, 0))
-        score_rect = score_text.get_rect(center=(SCREEN_RECT.width // 2, SCREEN_RECT.height // 2))
-        self.screen.blit(score_text, score_rect)
-        restart_text = font.render("R == Restart_game!", True, WHITE)
-        restart_rect = restart_text.get_rect(center=(SCREEN_RECT.width // 2, SCREEN_RECT.height // 2 + 50))
-        self.screen.blit(restart_text, restart_rect)
-        quit_text = font.render("Q== Quit_game!", True, WHITE)
-        quit_rect = quit_text.get_rect(center=(SCREEN_RECT.width // 2, SCREEN_RECT.height // 2 + 120))
-        self.screen.blit(quit_text, quit_rect)
+        self.__end_screen_frame("pass_screen", "YOU WIN!", (0, 255, 0))
+
+    def __recycle_sprites(self):
+        """清空敌机和子弹，并把它们还给对象池"""
+        self.lifecycle.clear()
+        for enemy in self.enemy_group.sprites():
+            enemy.kill()
+        for bullet in self.hero.bullets.sprites():
+            bullet.kill()
+        self.enemy_bullets.empty()
+
+    def restart(self, seed=None):
+        """重新开始一局，沿用这个游戏对象（敌机和子弹还给对象池）
+
+        传入seed时换用新的随机种子并把逻辑时钟归零，之后的过程与新建PlaneGame(seed=seed)相同。
+        """
+        if seed is not None:
+            self.seed = seed
+            self.rng = random.Random(seed)
+            self.game_clock = GameClock()
+        self.__restart_game()
+
+    def draw(self):
+        """按当前状态绘制一帧（无头模式下step之外需要画面时调用，比如刚开始一局时）"""
+        self.__draw_frame()
 
     def __restart_game(self):
         """重新开始游戏"""
+        self.__recycle_sprites()
         self.__create_sprites()
         self.is_game_over = False
+        self.is_paused = False
+        self.frame_mode = "play"
         self.speed_multiplier = 1.0
         self.score=0
-        self.game_start_time = time.time()
-        self.total_paused_time = 0
-        self.pause_start_time = 0
+        self.game_start_time = self.game_clock.time()
         self.last_elapsed_time = 0  # 重置
         self.is_passed = False  # 重置通关标志
+        self.__end_screen = None
+        self.reset_timers()
 
-    @staticmethod
-    def __game_over():
+    def __game_over(self):
         """游戏结束"""
+        if self.headless:
+            # 无头模式下不退出进程，只让step停止
+            self.is_quit = True
+            return
+        if self.recorder is not None:
+            self.recorder.close()
+        if self.profile_path:
+            self.profiler.export(self.profile_path)
         pygame.quit()
         sys.exit()
 
 
 if __name__ == '__main__':
-    game = PlaneGame()
-    game.start_game()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="飞机大战")
+    parser.add_argument("--seed", type=replay.seed_arg, help="随机种子")
+    parser.add_argument("--record", help="把输入录制到文件")
+    parser.add_argument("--replay", help="回放录制的输入文件")
+    parser.add_argument("--headless", action="store_true", help="无头模式全速回放")
+    parser.add_argument("--profile", help="开启性能统计，退出时导出为JSON/CSV")
+    parser.add_argument("--fps", type=int, default=FRAME_PER_SEC, help="渲染帧率（模拟固定60步/秒）")
+    parser.add_argument("--dirty-rects", action="store_true",
+                        help="脏矩形渲染：只提交变化的区域，背景滚动了的帧仍整屏更新（渲染帧率高于60时才有省下的帧）")
+    parser.add_argument("--hud-glyphs", action="store_true", help="信息栏的数字用预渲染的字形拼接")
+    args = parser.parse_args()
+    if args.replay:
+        game = replay.play(args.replay, headless=args.headless, dirty_rects=args.dirty_rects,
+                           hud_glyphs=args.hud_glyphs)
+        if args.headless:
+            print(f"回放结束: 帧数 {game.frame_count}, 得分 {game.score}, 游戏结束 {game.is_game_over}")
+    else:
+        game = PlaneGame(seed=args.seed, dirty_rects=args.dirty_rects, hud_glyphs=args.hud_glyphs)
+        game.render_fps = args.fps
+        if args.profile:
+            game.profiler.enabled = True
+            game.profile_path = args.profile
+        if args.record:
+            game.recorder = replay.InputRecorder(args.record, game.seed)
+        game.start_game()
\ No newline at end of file
@@ -0,0 +1,59 @@
+class SpritePool(object):
+    """精灵对象池
+
+    被kill()的精灵回收到空闲列表，下次acquire时调用reset()重置状态后复用，
+    避免频繁创建对象和垃圾回收造成的卡顿。
+    """
+
+    def __init__(self, factory, max_size=256):
+        self.factory = factory
+        self.max_size = max_size  # 空闲列表的上限，超出的精灵交给垃圾回收
+        self.__free = []
+        self.created = 0
+        self.reused = 0
+        self.dropped = 0
+        self.in_use = 0
+        self.high_water = 0
+
+    def acquire(self, *args):
+        """取出一个精灵，参数与factory/reset相同"""
+        if self.__free:
+            sprite = self.__free.pop()
+            sprite.reset(*args)
+            self.reused += 1
+        else:
+            sprite = self.factory(*args)
+            sprite.pool = self
+            self.created += 1
+        self.in_use += 1
+        if self.in_use > self.high_water:
+            self.high_water = self.in_use
+        return sprite
+
+    def release(self, sprite):
+        """回收精灵（由GameSprite.kill调用）"""
+        self.in_use -= 1
+        if len(self.__free) < self.max_size:
+            self.__free.append(sprite)
+        else:
+            self.dropped += 1
+
+    def clear(self):
+        self.__free.clear()
+
+    @property
+    def reuse_rate(self):
+        """复用次数占全部取用次数的比例"""
+        total = self.created + self.reused
+        return self.reused / total if total else 0.0
+
+    def stats(self):
+        return {
+            "created": self.created,
+            "reused": self.reused,
+            "dropped": self.dropped,
+            "in_use": self.in_use,
+            "free": len(self.__free),
+            "high_water": self.high_water,
+            "reuse_rate": self.reuse_rate,
+        }
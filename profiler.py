@@ -0,0 +1,159 @@
+import csv
+import json
+import time
+from collections import deque
+
+
+class _NullPhase(object):
+    """关闭统计时使用的空计时器"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_PHASE = _NullPhase()
+
+
+def percentile(values, p):
+    """values的第p百分位（取最近的样本，不插值）"""
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100.0 * (len(values) - 1))))]
+
+
+class _Phase(object):
+    """给一个阶段计时的上下文管理器"""
+
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.add(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class FrameProfiler(object):
+    """分阶段的帧耗时统计
+
+    每帧把各阶段耗时累加起来，保存最近window帧用于计算p50/p95/p99。
+    关闭时phase()只返回一个共享的空上下文，几乎没有开销。
+    """
+
+    def __init__(self, window=600):
+        self.enabled = False
+        self.overlay = False  # 是否在画面上显示统计
+        self.window = window
+        self.frames = 0
+        self.counts = {}  # 各组实体数量
+        self.__samples = {}
+        self.__current = {}
+        self.__depth = 0
+        self.__frame_start = 0.0
+        self.__overlay_lines = []
+
+    def phase(self, name):
+        """用with包住要统计的阶段"""
+        if not self.enabled:
+            return NULL_PHASE
+        return _Phase(self, name)
+
+    def add(self, name, seconds):
+        self.__current[name] = self.__current.get(name, 0.0) + seconds
+
+    def begin_frame(self):
+        """开始一帧，嵌套调用时只有最外层生效"""
+        if not self.enabled:
+            return
+        self.__depth += 1
+        if self.__depth == 1:
+            self.__current = {}
+            self.__frame_start = time.perf_counter()
+
+    def end_frame(self, counts=None):
+        """结束一帧，把本帧各阶段耗时（毫秒）存入滚动窗口"""
+        if not self.enabled:
+            self.__depth = 0  # 帧中途被关闭
+            return
+        if self.__depth == 0:
+            return
+        self.__depth -= 1
+        if self.__depth:
+            return
+        self.add("frame", time.perf_counter() - self.__frame_start)
+        for name, seconds in self.__current.items():
+            samples = self.__samples.get(name)
+            if samples is None:
+                samples = self.__samples[name] = deque(maxlen=self.window)
+            samples.append(seconds * 1000.0)
+        if counts is not None:
+            self.counts = counts
+        self.frames += 1
+
+    def reset(self):
+        self.__samples.clear()
+        self.frames = 0
+
+    def percentiles(self, name, ps=(50, 95, 99)):
+        """某阶段最近window帧的百分位耗时（毫秒）"""
+        values = self.__samples.get(name)
+        if not values:
+            return {}
+        return {f"p{p}": percentile(values, p) for p in ps}
+
+    def summary(self):
+        """所有阶段的百分位和平均耗时"""
+        result = {}
+        for name, samples in self.__samples.items():
+            stats = self.percentiles(name)
+            stats["mean"] = sum(samples) / len(samples)
+            stats["samples"] = len(samples)
+            result[name] = stats
+        return result
+
+    def export_json(self, path):
+        data = {"frames": self.frames, "phases": self.summary(), "counts": self.counts}
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+
+    def export_csv(self, path):
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["phase", "p50", "p95", "p99", "mean", "samples"])
+            for name, stats in sorted(self.summary().items()):
+                writer.writerow([name, stats["p50"], stats["p95"], stats["p99"], stats["mean"], stats["samples"]])
+
+    def export(self, path):
+        """按扩展名导出为JSON或CSV"""
+        if path.lower().endswith(".csv"):
+            self.export_csv(path)
+        else:
+            self.export_json(path)
+
+    def draw_overlay(self, surface, text, font, color, pos=(5, 90)):
+        """在画面上显示各阶段p50/p95/p99和实体数量，返回所占矩形"""
+        if self.frames % 30 == 0 or not self.__overlay_lines:
+            # 每30帧重新计算一次，避免每帧排序
+            lines = []
+            for name, stats in sorted(self.summary().items()):
+                lines.append(f"{name}: {stats['p50']:.2f}/{stats['p95']:.2f}/{stats['p99']:.2f} ms")
+            lines.append(" ".join(f"{tag}:{count}" for tag, count in self.counts.items()))
+            self.__overlay_lines = lines
+        x, y = pos
+        rects = []
+        for line in self.__overlay_lines:
+            rects.append(text.draw(surface, font, line, color, (x, y)))
+            y += font.get_linesize()
+        return rects
+
+
+# 从不开启的统计器，作为可选参数的默认值
+NULL_PROFILER = FrameProfiler()
@@ -0,0 +1,56 @@
+import pygame
+
+
+class DirtyTracker(object):
+    """脏矩形记录器：只把本帧和上一帧画过的区域提交给display.update
+
+    变化的区域太多或太大时（例如背景在滚动、显示遮罩层），直接整屏更新更便宜。
+    """
+
+    def __init__(self, screen_rect, full_ratio=0.5, max_rects=200):
+        self.screen_rect = screen_rect
+        self.full_ratio = full_ratio  # 脏区域面积超过屏幕的这个比例就整屏更新
+        self.max_rects = max_rects  # 矩形数量超过这个值就整屏更新
+        self.__previous = []  # 上一帧画过的区域
+        self.__current = []
+        self.__full = True  # 第一帧必须整屏更新
+        self.full_updates = 0
+        self.partial_updates = 0
+
+    @property
+    def is_full(self):
+        """本帧是否需要整屏重画"""
+        return self.__full
+
+    def invalidate(self):
+        """标记整屏需要更新"""
+        self.__full = True
+
+    def add(self, rects):
+        """记录本帧画过的区域"""
+        clip = self.screen_rect.clip
+        current = self.__current
+        for rect in rects:
+            rect = clip(rect)
+            if rect.width and rect.height:
+                current.append(rect)
+
+    def erase(self, surface, background):
+        """用静止背景覆盖上一帧画过的区域"""
+        for rect in self.__previous:
+            surface.blit(background, rect, rect)
+
+    def present(self):
+        """提交本帧的变化"""
+        rects = self.__previous + self.__current
+        self.__previous = self.__current
+        self.__current = []
+        if not self.__full and len(rects) <= self.max_rects:
+            area = sum(rect.width * rect.height for rect in rects)
+            if area <= self.full_ratio * self.screen_rect.width * self.screen_rect.height:
+                pygame.display.update(rects)
+                self.partial_updates += 1
+                return
+        self.__full = False
+        pygame.display.update()
+        self.full_updates += 1
@@ -0,0 +1,144 @@
+import argparse
+import struct
+
+import pygame
+
+from sim import FrameInput
+
+# 文件头：魔数、版本、随机种子、总帧数
+MAGIC = b"ABRP"
+VERSION = 1
+HEADER = struct.Struct("<4sBQI")
+# 种子在文件头里是8字节无符号整数
+MAX_SEED = 2 ** 64 - 1
+# 每段连续相同输入：重复帧数、移动键位掩码、鼠标x、鼠标y、标志位
+RUN = struct.Struct("<HBhhB")
+MAX_RUN = 0xFFFF
+
+# 影响游戏逻辑的按键，顺序即位掩码的位
+MOVE_KEYS = (pygame.K_LEFT, pygame.K_a, pygame.K_RIGHT, pygame.K_d,
+             pygame.K_UP, pygame.K_w, pygame.K_DOWN, pygame.K_s)
+ACTION_KEYS = (pygame.K_ESCAPE, pygame.K_r, pygame.K_q)
+FLAG_MOUSE_MOVED = 1
+FLAG_QUIT = 1 << 1
+ACTION_SHIFT = 2
+
+
+def seed_arg(text):
+    """命令行--seed的类型：能写进文件头的非负整数"""
+    seed = int(text)
+    if not 0 <= seed <= MAX_SEED:
+        raise argparse.ArgumentTypeError(f"种子必须在0到{MAX_SEED}之间: {text}")
+    return seed
+
+
+def encode_input(frame_input):
+    """把一帧输入压缩为(键位掩码, 鼠标x, 鼠标y, 标志位)"""
+    key_bits = 0
+    for bit, key in enumerate(MOVE_KEYS):
+        if frame_input.keys[key]:
+            key_bits |= 1 << bit
+    flags = 0
+    if frame_input.mouse_moved:
+        flags |= FLAG_MOUSE_MOVED
+    if getattr(frame_input, "quit", False):
+        flags |= FLAG_QUIT
+    for bit, key in enumerate(ACTION_KEYS):
+        if key in frame_input.key_downs:
+            flags |= 1 << (bit + ACTION_SHIFT)
+    mouse_x, mouse_y = frame_input.mouse_pos
+    return key_bits, mouse_x, mouse_y, flags
+
+
+def decode_input(key_bits, mouse_x, mouse_y, flags):
+    """还原为FrameInput"""
+    pressed = [key for bit, key in enumerate(MOVE_KEYS) if key_bits & (1 << bit)]
+    key_downs = [key for bit, key in enumerate(ACTION_KEYS) if flags & (1 << (bit + ACTION_SHIFT))]
+    return FrameInput(pressed, (mouse_x, mouse_y), key_downs,
+                      mouse_moved=bool(flags & FLAG_MOUSE_MOVED),
+                      quit=bool(flags & FLAG_QUIT))
+
+
+class InputRecorder(object):
+    """逐帧输入录制器，连续相同的输入合并成一段写入"""
+
+    def __init__(self, path, seed):
+        self.path = path
+        self.seed = seed
+        self.frames = 0
+        self.__file = open(path, "wb")
+        self.__file.write(HEADER.pack(MAGIC, VERSION, seed, 0))
+        self.__last = None
+        self.__count = 0
+
+    def record(self, frame_input):
+        """记录一帧输入"""
+        encoded = encode_input(frame_input)
+        if encoded == self.__last and self.__count < MAX_RUN:
+            self.__count += 1
+        else:
+            self.__flush()
+            self.__last = encoded
+            self.__count = 1
+        self.frames += 1
+
+    def __flush(self):
+        if self.__count:
+            self.__file.write(RUN.pack(self.__count, *self.__last))
+
+    def close(self):
+        """写入最后一段并回填总帧数"""
+        if self.__file.closed:
+            return
+        self.__flush()
+        self.__count = 0
+        self.__file.seek(0)
+        self.__file.write(HEADER.pack(MAGIC, VERSION, self.seed, self.frames))
+        self.__file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class InputReplay(object):
+    """读取录像文件，按帧索引返回FrameInput"""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            data = f.read()
+        magic, version, self.seed, _ = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"不是有效的录像文件: {path}")
+        self.frames = []
+        # 未正常关闭的录像头部帧数为0，因此一直读到文件末尾
+        for offset in range(HEADER.size, len(data) - RUN.size + 1, RUN.size):
+            count, *encoded = RUN.unpack_from(data, offset)
+            frame_input = decode_input(*encoded)
+            self.frames.extend([frame_input] * count)
+
+    def __len__(self):
+        return len(self.frames)
+
+    def __getitem__(self, index):
+        return self.frames[index]
+
+    def __iter__(self):
+        return iter(self.frames)
+
+
+def play(path, headless=False, **options):
+    """用录像里的种子重建游戏并回放，无头模式下全速运行后返回游戏对象
+
+    options是PlaneGame的绘制选项（dirty_rects、hud_glyphs），不影响回放结果。
+    """
+    from main import PlaneGame
+    replay = InputReplay(path)
+    game = PlaneGame(headless=headless, seed=replay.seed, **options)
+    if headless:
+        game.step(len(replay), replay)
+    else:
+        game.start_game(replay)
+    return game
@@ -0,0 +1,72 @@
+import heapq
+
+
+class ScheduledEvent(object):
+    """一个已安排的回调，cancel()后不会再执行"""
+
+    __slots__ = ("due", "interval", "callback", "args", "cancelled")
+
+    def __init__(self, due, interval, callback, args):
+        self.due = due
+        self.interval = interval  # 重复间隔，None表示只执行一次
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class Scheduler(object):
+    """基于最小堆的定时器，时间单位为游戏时钟的毫秒
+
+    每帧只看堆顶，开销与到期事件数成正比，与实体数量无关。
+    取消的事件留在堆里，到期时直接丢弃。
+    """
+
+    def __init__(self):
+        self.__heap = []
+        self.__seq = 0  # 同一时刻的事件按安排顺序执行
+
+    def __push(self, event):
+        self.__seq += 1
+        heapq.heappush(self.__heap, (event.due, self.__seq, event))
+
+    def at(self, due, callback, *args):
+        """在游戏时间due执行callback(now, *args)"""
+        event = ScheduledEvent(due, None, callback, args)
+        self.__push(event)
+        return event
+
+    def every(self, first, interval, callback, *args):
+        """从游戏时间first开始每隔interval执行一次callback(now, *args)"""
+        event = ScheduledEvent(first, interval, callback, args)
+        self.__push(event)
+        return event
+
+    def run_due(self, now):
+        """执行所有到期的事件，返回执行的个数
+
+        回调里新安排的事件如果也已到期，会在这次调用中一并执行。
+        """
+        heap = self.__heap
+        count = 0
+        while heap and heap[0][0] <= now:
+            event = heapq.heappop(heap)[2]
+            if event.cancelled:
+                continue
+            if event.interval is not None:
+                # 按固定节奏重复，不随执行时刻漂移
+                event.due += event.interval
+                self.__push(event)
+            event.callback(now, *event.args)
+            count += 1
+        return count
+
+    def clear(self):
+        for _, _, event in self.__heap:
+            event.cancel()
+        self.__heap.clear()
+
+    def __len__(self):
+        return sum(1 for _, _, event in self.__heap if not event.cancelled)
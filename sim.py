@@ -0,0 +1,78 @@
+import pygame
+
+
+class GameClock(object):
+    """游戏的逻辑时钟：只由advance推进，与真实时间无关"""
+
+    def __init__(self):
+        self.__ticks = 0
+
+    def get_ticks(self):
+        """当前游戏时间（毫秒）"""
+        return int(self.__ticks)
+
+    def time(self):
+        """当前游戏时间（秒）"""
+        return self.__ticks / 1000.0
+
+    def advance(self, ms):
+        """推进时间"""
+        self.__ticks += ms
+
+
+class KeyState(object):
+    """模拟的按键状态，用法与pygame.key.get_pressed()的返回值相同"""
+
+    def __init__(self, pressed=()):
+        self.pressed = frozenset(pressed)
+
+    def __getitem__(self, key):
+        return key in self.pressed
+
+
+class LiveInput(object):
+    """实时输入：读取当前的键盘和鼠标状态以及本帧的事件"""
+
+    def __init__(self, events=()):
+        self.keys = pygame.key.get_pressed()
+        self.mouse_pos = pygame.mouse.get_pos()
+        self.mouse_moved = pygame.mouse.get_rel() != (0, 0)
+        self.key_downs = tuple(event.key for event in events if event.type == pygame.KEYDOWN)
+        self.quit = any(event.type == pygame.QUIT for event in events)
+
+
+class FrameInput(object):
+    """模拟输入：一帧内按住的键、鼠标位置和按下的键"""
+
+    def __init__(self, pressed=(), mouse_pos=None, key_downs=(), mouse_moved=None, quit=False):
+        self.keys = KeyState(pressed)
+        self.mouse_pos = mouse_pos if mouse_pos is not None else (-1, -1)
+        self.mouse_moved = mouse_pos is not None if mouse_moved is None else mouse_moved
+        self.key_downs = tuple(key_downs)
+        self.quit = quit
+
+    def events(self):
+        """把按下的键和退出请求转换为pygame事件"""
+        events = [pygame.event.Event(pygame.KEYDOWN, key=key) for key in self.key_downs]
+        if self.quit:
+            events.append(pygame.event.Event(pygame.QUIT))
+        return events
+
+
+# 不做任何操作的输入
+NO_INPUT = FrameInput()
+# 暂停中按ESC继续游戏
+RESUME_INPUT = FrameInput(key_downs=(pygame.K_ESCAPE,))
+# 训练环境和自动驾驶的动作：编号 -> 按住的方向键
+ACTIONS = (
+    (),
+    (pygame.K_UP,),
+    (pygame.K_DOWN,),
+    (pygame.K_LEFT,),
+    (pygame.K_RIGHT,),
+    (pygame.K_UP, pygame.K_LEFT),
+    (pygame.K_UP, pygame.K_RIGHT),
+    (pygame.K_DOWN, pygame.K_LEFT),
+    (pygame.K_DOWN, pygame.K_RIGHT),
+)
+ACTION_INPUTS = tuple(FrameInput(pressed=keys) for keys in ACTIONS)
@@ -0,0 +1,268 @@
+"""长时间自动驾驶浸泡测试：检查帧时间和内存会不会随运行时间漂移
+
+    python soak.py --minutes 180 --out soak.jsonl
+自动驾驶躲避敌机和子弹、自动开火，被击落或通关后按R重新开始，一直循环。
+每隔--interval帧采样一次帧时间、各组实体数、对象池、定时器、进程RSS
+（加--tracemalloc时还有Python分配的内存），结束时对每项指标检查是否单调增长，
+有增长的项时退出码为1。
+"""
+import argparse
+import gc
+import json
+import os
+import time
+import tracemalloc
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import numpy as np
+import pygame
+
+from core import SCREEN_RECT, FRAME_PER_SEC
+from main import PlaneGame
+from profiler import percentile
+from sim import ACTIONS, ACTION_INPUTS, FrameInput
+
+# 英雄键盘移动每帧的像素数（与PlaneGame的键盘移动一致）
+HERO_STEP = 5
+# 自动驾驶向前预测的帧数
+LOOKAHEAD = (2, 5, 10, 16, 24)
+RESTART_INPUT = FrameInput(key_downs=(pygame.K_r,))
+
+_DIRECTIONS = {pygame.K_UP: (0, -1), pygame.K_DOWN: (0, 1), pygame.K_LEFT: (-1, 0), pygame.K_RIGHT: (1, 0)}
+
+
+class Autopilot(object):
+    """脚本控制的英雄
+
+    每帧对9个方向一次性预测LOOKAHEAD各帧后的位置，按会撞上的敌机子弹和敌机打分
+    （越近的撞击权重越大），再加上离开火线位置和初始高度的代价，选代价最小的方向。
+    开火由游戏每帧自动调用Hero.fire，出界由游戏的边界限制处理。
+    游戏结束或通关后发送R键重新开始。
+    """
+
+    def __init__(self, game, margin=6):
+        self.game = game
+        self.margin = margin  # 预测时英雄矩形外扩的像素，留出余量
+        self.home_y = SCREEN_RECT.bottom - 120
+        moves = []
+        for keys in ACTIONS:
+            moves.append((sum(_DIRECTIONS[key][0] for key in keys), sum(_DIRECTIONS[key][1] for key in keys)))
+        self.moves = np.array(moves, dtype=float) * HERO_STEP
+        self.times = np.array(LOOKAHEAD, dtype=float)
+
+    def __call__(self):
+        """这一帧的输入"""
+        game = self.game
+        if game.is_game_over or game.is_passed:
+            return RESTART_INPUT
+        return ACTION_INPUTS[self.choose()]
+
+    def __positions(self, rect):
+        """每个方向在每个预测时刻英雄的左上角，形状(方向, 时刻)，按屏幕范围限制"""
+        times = self.times[None, :]
+        x = np.clip(rect.x + self.moves[:, 0:1] * times, 0, SCREEN_RECT.width - rect.width)
+        y = np.clip(rect.y + self.moves[:, 1:2] * times, 0, SCREEN_RECT.height - rect.height)
+        return x, y
+
+    def __danger(self, x, y, rect, left, top, width, height, vy):
+        """与各方向各时刻的英雄矩形相撞的物体数，按时刻远近加权后求和
+
+        物体以每帧vy竖直移动（子弹的横向速度为0）。
+        """
+        margin = self.margin
+        times = self.times
+        obj_top = top[None, :] + vy[None, :] * times[:, None]  # (时刻, 物体)
+        hit_x = ((left[None, None, :] < (x + rect.width + margin)[:, :, None])
+                 & ((left + width)[None, None, :] > (x - margin)[:, :, None]))
+        hit_y = ((obj_top[None, :, :] < (y + rect.height + margin)[:, :, None])
+                 & ((obj_top + height[None, :])[None, :, :] > (y - margin)[:, :, None]))
+        return 100.0 * ((hit_x & hit_y).sum(axis=2) / times[None, :]).sum(axis=1)
+
+    def choose(self):
+        game = self.game
+        rect = game.hero.rect
+        x, y = self.__positions(rect)
+        cost = np.zeros(len(self.moves))
+        bullets = game.enemy_bullets
+        alive = bullets.alive[:bullets.count]
+        if alive.any():
+            pos = bullets.pos[:bullets.count][alive]
+            size = np.ones(len(pos))
+            cost += self.__danger(x, y, rect, pos[:, 0], pos[:, 1], size * bullets.width, size * bullets.height,
+                                  bullets.vel[:bullets.count][alive, 1])
+        enemies = game.enemy_group.sprites()
+        if enemies:
+            rects = np.array([enemy.rect for enemy in enemies], dtype=float)
+            speed = np.array([enemy.speed for enemy in enemies], dtype=float)
+            cost += self.__danger(x, y, rect, rects[:, 0], rects[:, 1], rects[:, 2], rects[:, 3], speed)
+            # 对准最近一架在前方的敌机，方便击落
+            ahead = rects[:, 1] + rects[:, 3] < rect.top
+            if ahead.any():
+                centers = rects[ahead, 0] + rects[ahead, 2] / 2
+                next_x = x[:, 0] + rect.width / 2
+                cost += np.abs(next_x[:, None] - centers[None, :]).min(axis=1) / SCREEN_RECT.width
+        # 不躲避时回到初始高度附近
+        cost += np.abs(y[:, 0] + rect.height - self.home_y) / SCREEN_RECT.height
+        return int(np.argmin(cost))
+
+
+def rss_bytes():
+    """进程当前的常驻内存（字节），读不到时返回None"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+def heap_usage():
+    """回收垃圾后的(Python对象数, tracemalloc跟踪到的字节数)"""
+    gc.collect()
+    traced = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None
+    return len(gc.get_objects()), traced
+
+
+def sample(game, frame_times, games, objects, traced):
+    """采样一次，frame_times为这一段时间内每帧的耗时（毫秒）"""
+    data = {
+        "time": time.time(),
+        "frames": game.frame_count,
+        "games": games,
+        "score": game.score,
+        "frame_ms": sum(frame_times) / len(frame_times),
+        "frame_ms_p99": percentile(frame_times, 99),
+        "counts": game.entities.counts(),
+        "lifecycle": game.lifecycle.stats(),
+        "enemy_pool": game.enemy_pool.in_use,
+        "bullet_pool": game.bullet_pool.in_use,
+        "timers": len(game.scheduler),
+        "objects": objects,
+        "rss": rss_bytes(),
+    }
+    if traced is not None:
+        data["traced"] = traced
+    return data
+
+
+def metrics(data):
+    """一次采样中要检查增长的指标"""
+    values = {
+        "frame_ms": data["frame_ms"],
+        "enemy_pool": data["enemy_pool"],
+        "bullet_pool": data["bullet_pool"],
+        "timers": data["timers"],
+        "objects": data["objects"],
+    }
+    for tag, count in data["counts"].items():
+        values["count:" + tag] = count
+    for name in ("rss", "traced"):
+        if data.get(name) is not None:
+            values[name] = data[name]
+    return values
+
+
+def find_growth(samples, warmup=0.25, rising=0.8, min_rise=0.05, min_samples=5):
+    """找出单调增长的指标
+
+    跳过前warmup比例的采样（缓存和对象池还在填充），之后相邻采样上升的次数
+    不少于rising比例、并且总涨幅超过开头的min_rise时算作增长。返回{指标: (开头, 结尾)}。
+    剩下的采样少于min_samples时不做判断（一局之内难度上升，帧时间本来就会变长）。
+    """
+    samples = samples[int(len(samples) * warmup):]
+    if len(samples) < min_samples:
+        return {}
+    series = {}
+    for data in samples:
+        for name, value in metrics(data).items():
+            series.setdefault(name, []).append(value)
+    growing = {}
+    for name, values in series.items():
+        if len(values) != len(samples):
+            continue  # 中途才出现的指标
+        rises = sum(1 for a, b in zip(values, values[1:]) if b > a)
+        first, last = values[0], values[-1]
+        if rises >= rising * (len(values) - 1) and last - first > min_rise * max(abs(first), 1):
+            growing[name] = (first, last)
+    return growing
+
+
+def run_soak(seed=0, frames=None, minutes=None, interval=FRAME_PER_SEC * 30, render=True, trace=False,
+             out=None, report=print):
+    """运行浸泡测试直到frames帧或minutes分钟，返回全部采样"""
+    if trace:
+        tracemalloc.start()
+    game = PlaneGame(headless=True, seed=seed)
+    game.render = render
+    pilot = Autopilot(game)
+    deadline = None if minutes is None else time.perf_counter() + minutes * 60
+    samples = []
+    frame_times = []
+    games = 1
+    was_over = False
+    # 保存采样本身占用的对象和内存，从测量值里扣掉，否则采样越多越像泄漏
+    own_objects, own_traced = 0, 0
+    try:
+        while (frames is None or game.frame_count < frames) and (deadline is None or time.perf_counter() < deadline):
+            frame_input = pilot()
+            start = time.perf_counter()
+            game.step(1, frame_input)
+            frame_times.append((time.perf_counter() - start) * 1000)
+            over = game.is_game_over or game.is_passed
+            if was_over and not over:
+                games += 1
+            was_over = over
+            if len(frame_times) >= interval:
+                objects, traced = heap_usage()
+                objects -= own_objects
+                if traced is not None:
+                    traced -= own_traced
+                data = sample(game, frame_times, games, objects, traced)
+                samples.append(data)
+                after_objects, after_traced = heap_usage()
+                own_objects = after_objects - objects
+                if traced is not None:
+                    own_traced = after_traced - traced
+                frame_times = []
+                if out is not None:
+                    out.write(json.dumps(data, ensure_ascii=False) + "\n")
+                    out.flush()
+                report(f"{data['frames']:9d} 帧  第{games}局  {data['frame_ms']:.2f} ms/帧  "
+                       f"敌机 {data['counts'].get('enemy', 0)}  子弹 {data['counts'].get('enemy_bullet', 0)}  "
+                       f"RSS {(data['rss'] or 0) / 2 ** 20:.1f} MB")
+    finally:
+        if trace:
+            tracemalloc.stop()
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="长时间自动驾驶浸泡测试")
+    parser.add_argument("--minutes", type=float, help="运行多少分钟（真实时间）")
+    parser.add_argument("--frames", type=int, help="运行多少帧（与--minutes先到为准）")
+    parser.add_argument("--interval", type=int, default=FRAME_PER_SEC * 30, help="每隔多少帧采样一次")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-render", action="store_true", help="只跑游戏逻辑，不绘制")
+    parser.add_argument("--tracemalloc", action="store_true", help="同时跟踪Python分配的内存（较慢）")
+    parser.add_argument("--out", help="把每次采样写入JSONL文件")
+    args = parser.parse_args()
+    if args.minutes is None and args.frames is None:
+        parser.error("需要--minutes或--frames")
+
+    out = open(args.out, "w", encoding="utf-8") if args.out else None
+    try:
+        samples = run_soak(args.seed, args.frames, args.minutes, args.interval, render=not args.no_render,
+                           trace=args.tracemalloc, out=out)
+    finally:
+        if out is not None:
+            out.close()
+    growing = find_growth(samples)
+    for name, (first, last) in growing.items():
+        print(f"持续增长: {name} {first} -> {last}")
+    if growing:
+        raise SystemExit(1)
+    print(f"{len(samples)} 次采样，没有发现持续增长的指标")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""Broadphase.groupcollide与pygame.sprite.groupcollide结果一致
+
+    python -m unittest test_collision
+"""
+import random
+import unittest
+
+import pygame
+
+from collision import Broadphase
+
+BOUNDS = pygame.Rect(0, 0, 433, 650)
+
+
+class Box(pygame.sprite.Sprite):
+    def __init__(self, rect):
+        super().__init__()
+        self.rect = pygame.Rect(rect)
+
+
+def make_group(rects):
+    return pygame.sprite.Group([Box(rect) for rect in rects])
+
+
+def random_rects(rng, count, max_size):
+    # 包括超出屏幕的矩形
+    return [(rng.randint(-80, BOUNDS.width + 20), rng.randint(-80, BOUNDS.height + 20),
+             rng.randint(1, max_size), rng.randint(1, max_size)) for _ in range(count)]
+
+
+def as_rects(crashed):
+    """把结果换成按矩形比较的形式（两次检测用的是两套精灵）"""
+    return sorted((tuple(sprite.rect), sorted(tuple(other.rect) for other in hits))
+                  for sprite, hits in crashed.items())
+
+
+class BroadphaseTest(unittest.TestCase):
+
+    def check(self, count_a, count_b, dokilla, dokillb, seed):
+        rng = random.Random(seed)
+        rects_a = random_rects(rng, count_a, 40)
+        rects_b = random_rects(rng, count_b, 120)
+        expected_a, expected_b = make_group(rects_a), make_group(rects_b)
+        actual_a, actual_b = make_group(rects_a), make_group(rects_b)
+        expected = pygame.sprite.groupcollide(expected_a, expected_b, dokilla, dokillb)
+        broadphase = Broadphase()
+        actual = broadphase.groupcollide(actual_a, actual_b, dokilla, dokillb)
+        self.assertEqual(as_rects(actual), as_rects(expected))
+        self.assertEqual(sorted(tuple(s.rect) for s in actual_a), sorted(tuple(s.rect) for s in expected_a))
+        self.assertEqual(sorted(tuple(s.rect) for s in actual_b), sorted(tuple(s.rect) for s in expected_b))
+
+    def test_match_groupcollide(self):
+        for seed in range(40):
+            for count_b in (0, 3, 16, 64):
+                for dokilla, dokillb in ((False, False), (True, False), (False, True), (True, True)):
+                    with self.subTest(seed=seed, count_b=count_b, dokill=(dokilla, dokillb)):
+                        self.check(30, count_b, dokilla, dokillb, seed)
+
+    def test_insert_matches_build(self):
+        rng = random.Random(1)
+        sprites = [Box(rect) for rect in random_rects(rng, 40, 120)]
+        incremental = Broadphase()
+        for sprite in sprites:
+            incremental.insert(sprite)
+        built = Broadphase()
+        built.build(sprites)
+        for rect in random_rects(rng, 200, 150):
+            rect = pygame.Rect(rect)
+            self.assertEqual(incremental.query(rect), built.query(rect))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+from collections import OrderedDict
+
+# 字形图集里预渲染的字符
+GLYPH_CHARS = "0123456789.-"
+
+
+class GlyphAtlas(object):
+    """数字字形图集：预先渲染每个字符，数值用逐字blit拼出来"""
+
+    def __init__(self, font, color, chars=GLYPH_CHARS):
+        self.glyphs = {char: font.render(char, True, color) for char in chars}
+        self.height = font.get_height()
+
+    def size(self, text):
+        return sum(self.glyphs[char].get_width() for char in text), self.height
+
+    def draw(self, surface, text, pos):
+        """在pos处画出text，返回画完后的x坐标"""
+        x, y = pos
+        sequence = []
+        for char in text:
+            glyph = self.glyphs[char]
+            sequence.append((glyph, (x, y)))
+            x += glyph.get_width()
+        surface.blits(sequence, doreturn=False)
+        return x
+
+
+class TextRenderer(object):
+    """文字渲染缓存
+
+    以(字体, 文本, 颜色)为键缓存渲染好的Surface，超出容量时淘汰最久未用的。
+    开启字形图集模式后，文本中的数字部分用预渲染的字形拼接，数值频繁变化也不用重新渲染。
+    """
+
+    def __init__(self, max_size=128, use_glyphs=False):
+        self.max_size = max_size
+        self.use_glyphs = use_glyphs
+        self.__cache = OrderedDict()
+        self.__atlases = {}
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, color):
+        """返回渲染好的文字Surface"""
+        key = (font, text, color)
+        surface = self.__cache.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.__cache.move_to_end(key)
+            return surface
+        self.misses += 1
+        surface = font.render(text, True, color)
+        self.__cache[key] = surface
+        if len(self.__cache) > self.max_size:
+            self.__cache.popitem(last=False)
+        return surface
+
+    def __atlas(self, font, color):
+        atlas = self.__atlases.get((font, color))
+        if atlas is None:
+            atlas = self.__atlases[(font, color)] = GlyphAtlas(font, color)
+        return atlas
+
+    @staticmethod
+    def __split(text):
+        """把文本切成(是否数字段, 片段)的列表"""
+        runs = []
+        for char in text:
+            is_glyph = char in GLYPH_CHARS
+            if runs and runs[-1][0] == is_glyph:
+                runs[-1][1].append(char)
+            else:
+                runs.append((is_glyph, [char]))
+        return [(is_glyph, "".join(chars)) for is_glyph, chars in runs]
+
+    def draw(self, surface, font, text, color, pos=None, center=None):
+        """画文字，pos为左上角或center为中心点，返回所占矩形"""
+        if not self.use_glyphs:
+            image = self.render(font, text, color)
+            if center is not None:
+                rect = image.get_rect(center=center)
+            else:
+                rect = image.get_rect(topleft=pos)
+            surface.blit(image, rect)
+            return rect
+        atlas = self.__atlas(font, color)
+        runs = self.__split(text)
+        width = sum(atlas.size(run)[0] if is_glyph else font.size(run)[0] for is_glyph, run in runs)
+        if center is not None:
+            x, y = center[0] - width // 2, center[1] - atlas.height // 2
+        else:
+            x, y = pos
+        left = x
+        for is_glyph, run in runs:
+            if is_glyph:
+                x = atlas.draw(surface, run, (x, y))
+            else:
+                image = self.render(font, run, color)
+                surface.blit(image, (x, y))
+                x += image.get_width()
+        return surface.get_rect().clip((left, y, width, atlas.height))
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "cached": len(self.__cache)}